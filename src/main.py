@@ -1,33 +1,29 @@
 from pathlib import Path
 from utils import lex
-from utils import augment_grammar, compute_first_follow, build_slr_table, derv, gramatica
+from utils import cached_slr_table, derv, gramatica
 from utils import SemanticAnalyzer, TACGenerator, generate_asm_from_tac
 import sys
 import os
 import subprocess
+import functools
 
 __version__ = "1.0.0"
 
-def main():
-    if len(sys.argv) < 2:
-        sys.exit("Uso: ibr <argumento(s)>")
+@functools.lru_cache(maxsize=1)
+def _slr(debug : bool = False) -> dict:
+    """Tabela SLR(1) da linguagem; construída (ou lida do cache em disco) uma vez por processo"""
+    return cached_slr_table(gramatica, debug=debug)
 
-    if sys.argv[1] in ("-v", "--version"):
-        print(f"versão {__version__}")
-        return
-
-    archive : str = sys.argv[1]
-    output_archive : str = sys.argv[2] if len(sys.argv) > 2 else "program.exe"
+def compile_file(archive : str, output_archive : str = "program.exe", debug : bool = False) -> bool:
+    """Compila um arquivo .ibr até o executável; retorna False se houver erros semânticos"""
 
     """ANALISE LÉXICA"""
     token_list : list = lex(archive)
 
     """ANALISE SINTÁTICA"""
-    ff_set = compute_first_follow(gramatica)
-    augmented_grammar = augment_grammar(gramatica)
-    slr = build_slr_table(augmented_grammar, ff_set)
-
-    derivation_tree = derv(token_list, slr)
+    derivation_tree = derv(token_list, _slr(debug), debug)
+    if derivation_tree is None:
+        return False
 
     #derivation_tree.print_tree_format()
 
@@ -36,12 +32,34 @@ def main():
 
     sem_errors = sem.analyse(derivation_tree.root)
 
-    if not sem_errors:
-        tac_gen = TACGenerator()
-        tac_code = tac_gen.generate(derivation_tree.root, sem.symbols)
-        asm_path = generate_asm_from_tac(tac_code, Path("out.s"))
-        subprocess.run(["gcc", "out.s", "-o", output_archive])
-        subprocess.run(["rm", "out.s"])
+    if sem_errors:
+        return False
+
+    tac_gen = TACGenerator(debug)
+    tac_code = tac_gen.generate(derivation_tree.root, sem.symbols)
+    asm_path = generate_asm_from_tac(tac_code, Path("out.s"))
+    subprocess.run(["gcc", str(asm_path), "-o", output_archive])
+    asm_path.unlink(missing_ok=True)
+    return True
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Uso: ibr <argumento(s)>")
+
+    if sys.argv[1] in ("-v", "--version"):
+        print(f"versão {__version__}")
+        return
+
+    args = sys.argv[1:]
+    debug : bool = "-d" in args or "--debug" in args
+    args = [a for a in args if a not in ("-d", "--debug")]
+    if not args:
+        sys.exit("Uso: ibr <argumento(s)>")
+
+    archive : str = args[0]
+    output_archive : str = args[1] if len(args) > 1 else "program.exe"
+
+    compile_file(archive, output_archive, debug)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
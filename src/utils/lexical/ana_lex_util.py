@@ -1,22 +1,18 @@
-import re
-import sys
-
-from .pattern_util import patterns_list
+from .pattern_util import MASTER_RE, GROUP_TO_DESC
 
 # ========== Análise Léxica ==========
 # Função que realiza a análise léxica do arquivo de entrada
 def lex_anal(arch : str) -> list:
     tokens = []
+    append = tokens.append  # referências locais: evitam lookups a cada token
+    group_to_desc = GROUP_TO_DESC
     line = 1
-    while arch:
-        for pattern, desc in patterns_list:
-            match = re.match(pattern, arch)
-            if match:
-                tokens.append((match.group(0), desc, line))
-                if tokens[-1][0] == "\n":
-                    line += 1
-                arch = arch[match.end():]
-                break
+    # Todo caractere casa com algum padrão (o último é "."), então as
+    # ocorrências do finditer são contíguas e o laço de varredura roda em C.
+    for match in MASTER_RE.finditer(arch):
+        token = match.group(0)
+        append((token, group_to_desc[match.lastgroup], line))
+        line += token.count("\n")
     return tokens
 
 def lex(archive : str):
@@ -25,15 +21,5 @@ def lex(archive : str):
         fl = file.read()
 
     tokens = lex_anal(fl)
-        
-    if tokens:
-        for token in tokens:
-            val = token[0]
-            if val == "\n":
-                val = "\\n"
-            elif val == "\t":
-                val = "\\t"
-            elif val == " ":
-                val = "' '"
 
     return tokens
\ No newline at end of file
@@ -1,14 +1,16 @@
+import re
+
 patterns_list = [
     # Comentários
-    (r"saturnita.*", "COMENTARIO"),
+    (r"saturnita[^\n]*", "COMENTARIO"),
 
-    # Quebra de linha e espaços
-    (r"\n", "QUEBRA_DE_LINHA"),
+    # Quebra de linha e espaços (sequências viram um único token)
+    (r"\n+", "QUEBRA_DE_LINHA"),
     (r"\t", "TABULACAO"),
-    (r" ", "ESPACO"),
+    (r" +", "ESPACO"),
 
     # Palavras-chave
-    (r"tralalero|tralala|porcodio|porcoala", "TIPO_DE_VARIAVEL"),
+    (r"tralal(?:ero|a)|porco(?:dio|ala)", "TIPO_DE_VARIAVEL"),
     (r"lirili|larila", "INICIO_E_FIM_DE_ESTRUTURA_DE_DECISAO"),
     (r"dunmadin", "INICIO_DE_LACO_CONTADO"),
     (r"tung|sahur", "INICIO_E_FIM_DE_LACO_DE_REPETICAO"),
@@ -20,19 +22,25 @@ patterns_list = [
     # Identificadores (após palavras-chave)
     (r"[a-z][a-zA-Z0-9]*", "id"),
 
-    # Literais
+    # Literais (classes negadas no lugar de ".*?" evitam backtracking)
     (r"\d+\.\d+", "valor_real"),
     (r"\d+", "valor_inteiro"),
-    (r"\".*?\"", "string"),
-    (r"'.*?'", "caractere"),
+    (r"\"[^\"\n]*\"", "string"),
+    (r"'[^'\n]*'", "caractere"),
 
     # Operadores
-    (r"\+|\-|\*|\/|\%", "OPERADOR_ARITMETICO"),
-    (r"==|!=|>=|<=|>|<", "OPERADOR_RELACIONAL"),
+    (r"[-+*/%]", "OPERADOR_ARITMETICO"),
+    (r"[=!<>]=|[<>]", "OPERADOR_RELACIONAL"),
     (r"\&\&|\|\|", "OPERADOR_LOGICO"),
     (r"=", "ATRIBUICAO"),
     (r";", "FIM_DE_INSTRUCAO"),
 
     # Captura qualquer outro caractere (erro léxico)
     (r".", "TOKEN_INVALIDO"),
-]
\ No newline at end of file
+]
+
+# Todos os padrões fundidos em uma única alternância com grupos nomeados.
+# A alternância do `re` é ordenada, então o primeiro padrão da lista continua
+# tendo prioridade, como no laço padrão a padrão.
+MASTER_RE = re.compile("|".join(f"(?P<g{i}>{pattern})" for i, (pattern, _) in enumerate(patterns_list)))
+GROUP_TO_DESC = {f"g{i}": desc for i, (_, desc) in enumerate(patterns_list)}
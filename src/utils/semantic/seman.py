@@ -3,9 +3,28 @@ Analisador Semântico - Percorre a árvore de derivação e valida regras semân
 Implementado com funções puras, sem classes (consistente com léxico e sintático)
 """
 
+import sys
+
 from ..syntactic import DerivationNode
 
+# Nós que apenas agrupam comandos; são percorridos sem recursão por _walk
+_STRUCTURAL_SYMBOLS = frozenset({"PROGRAMA", "LISTA_DE_COMANDOS", "COMANDO", "BLOCO"})
+
+# delimitadores de BLOCO_DECISAO/BLOCO_REPETICAO, que não têm regra semântica
+_BLOCK_DELIMITERS = frozenset({"delimitare", "finitini", "sahur"})
+
+_NUMERIC_TYPES = frozenset({"tralalero", "tralala"})
+_DECISAO_BRANCHES = frozenset({"BLOCO", "BLOCO_DECISAO", "BLOCO_REPETICAO", "DECISAO"})
+# filho de OPERADOR -> categoria usada na checagem de tipos de EXPRESSAO
+_OPERATOR_CATEGORY = {
+    "OPERADOR_ARITMETICO": "arit",
+    "OPERADOR_RELACIONAL": "rel",
+    "OPERADOR_LOGICO": "log",
+}
+
 class SymbolEntry:
+    __slots__ = ("name", "tipo", "scope")
+
     def __init__(self, name: str, tipo: str, scope: int):
         self.name: str = name
         self.tipo: str = tipo
@@ -14,6 +33,9 @@ class SymbolEntry:
 class SemanticAnalyzer:
     def __init__(self):
         self.symbols: list[SymbolEntry] = []
+        self.symbols_by_scope: dict[int, dict[str, SymbolEntry]] = {}  # escopo -> nome -> símbolo
+        self.visible: dict[str, list[SymbolEntry]] = {}  # nome -> pilha de declarações visíveis
+        self.scope_names: list[list[str]] = [[]]  # nomes declarados em cada escopo aberto
         self.scope_stack: list[int] = [0]
         self.scope_id = 0
         self.errors: list[str] = []
@@ -24,82 +46,113 @@ class SemanticAnalyzer:
     def enter_scope(self):
         self.scope_id += 1
         self.scope_stack.append(self.scope_id)
+        self.scope_names.append([])
 
     def exit_scope(self):
         if len(self.scope_stack) > 1:
             self.scope_stack.pop()
+            # as declarações do escopo fechado deixam de ser visíveis
+            for name in self.scope_names.pop():
+                stack = self.visible[name]
+                stack.pop()
+                if not stack:
+                    del self.visible[name]
         
     def declare(self, name: str, tipo: str):
         cur = self.scope_stack[-1]
-        for s in self.symbols:
-            if s.name == name and s.scope == cur:
-                self.error(f"Variável {name} ja declarada no escopo {cur}")
-                return
-        self.symbols.append(SymbolEntry(name, tipo, cur))
+        scope = self.symbols_by_scope.setdefault(cur, {})
+        if name in scope:
+            self.error(f"Variável {name} ja declarada no escopo {cur}")
+            return
+        entry = SymbolEntry(name, tipo, cur)
+        scope[name] = entry
+        self.symbols.append(entry)
+        self.visible.setdefault(name, []).append(entry)
+        self.scope_names[-1].append(name)
 
     def lookup(self, name: str) -> SymbolEntry | None:
-        for sc in reversed(self.scope_stack):
-            for s in self.symbols:
-                if s.name == name and s.scope == sc:
-                    return s
-        return None
+        # o topo da pilha é sempre a declaração do escopo aberto mais interno
+        stack = self.visible.get(name)
+        return stack[-1] if stack else None
 
     """API"""
     def analyse(self, root: DerivationNode):
         self.visit(root)
         if self.errors:
             #print("Erros semanticos encontrados:")
-            for err in self.errors:
-                print(f" - {err}")
+            sys.stdout.write("".join(f" - {err}\n" for err in self.errors))
         return self.errors
 
     """visitor"""
     def visit(self, node):
         if node is None:
             return None
-        # anotar tipo no próprio nó (deixa pronto pro TAC)
-        if not hasattr(node, "type"):
-            node.type = None
-
-        method = getattr(self, f"visit_{node.symbol}", self.generic_visit)
-        return method(node)
+        # o tipo é anotado no próprio nó (DerivationNode.type, deixa pronto pro TAC)
+        # cache símbolo -> função visit_<símbolo>, próprio de cada (sub)classe
+        cls = type(self)
+        cache = cls.__dict__.get("_dispatch_cache")
+        if cache is None:
+            cache = {}
+            cls._dispatch_cache = cache
+        method = cache.get(node.symbol)
+        if method is None:
+            method = getattr(cls, "visit_" + node.symbol, cls.generic_visit)
+            cache[node.symbol] = method
+        return method(self, node)
 
     def generic_visit(self, node):
-        for c in getattr(node, "children", []):
-            self.visit(c)
-        return getattr(node, "type", None)
+        for c in node.children:
+            if not c.is_terminal:
+                self.visit(c)
+        return node.type
+
+    def _walk(self, node):
+        """
+        Percorre os nós estruturais com uma pilha explícita, em pré-ordem.
+        LISTA_DE_COMANDOS é recursiva à direita, então a recursão comum gastaria
+        um frame por comando; aqui só os nós com regra própria passam por visit.
+        """
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.symbol in _STRUCTURAL_SYMBOLS:
+                stack.extend(reversed(n.children))
+            elif not n.is_terminal:
+                # folhas (';', delimitadores...) não têm regra: nem passam por visit
+                self.visit(n)
     
     # ---------- regras por nó (conforme gramatica_util.py) ----------
+    # PROGRAMA -> LISTA_DE_COMANDOS
+    # LISTA_DE_COMANDOS -> COMANDO LISTA_DE_COMANDOS | COMANDO
+    # BLOCO é wrapper: BLOCO -> BLOCO_DECISAO | BLOCO_REPETICAO
     def visit_PROGRAMA(self, node):
-        # PROGRAMA -> LISTA_DE_COMANDOS
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
 
     def visit_LISTA_DE_COMANDOS(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
 
     def visit_COMANDO(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
 
-    # BLOCO é wrapper: BLOCO -> BLOCO_DECISAO | BLOCO_REPETICAO
     def visit_BLOCO(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
 
     # BLOCO_DECISAO -> delimitare LISTA_DE_COMANDOS finitini
     def visit_BLOCO_DECISAO(self, node):
         self.enter_scope()
+        visit = self.visit
         for c in node.children:
-            self.visit(c)
+            if c.symbol not in _BLOCK_DELIMITERS:
+                visit(c)
         self.exit_scope()
 
     # BLOCO_REPETICAO -> sahur LISTA_DE_COMANDOS sahur
     def visit_BLOCO_REPETICAO(self, node):
         self.enter_scope()
+        visit = self.visit
         for c in node.children:
-            self.visit(c)
+            if c.symbol not in _BLOCK_DELIMITERS:
+                visit(c)
         self.exit_scope()
 
     # DECLARACAO -> TIPO_DE_VARIAVEL id ATRIBUICAO ;
@@ -156,56 +209,66 @@ class SemanticAnalyzer:
 
     # DECISAO -> lirili EXPRESSAO BLOCO [larila BLOCO|DECISAO]
     def visit_DECISAO(self, node):
-        # acha a EXPRESSAO (condição)
-        cond_type = None
+        # uma passada: acha a EXPRESSAO (condição) e os blocos/else
+        expr = None
+        branches = []
         for c in node.children:
             if c.symbol == "EXPRESSAO":
-                cond_type = self.visit(c)
-                break
+                if expr is None:
+                    expr = c
+            elif c.symbol in _DECISAO_BRANCHES:
+                branches.append(c)
 
+        cond_type = self.visit(expr)
         if cond_type is not None and cond_type != "porcoala":
             self.error(f"Condição do lirili deve ser porcoala, recebido {cond_type}")
 
         # visita blocos/else
-        for c in node.children:
-            if c.symbol in ("BLOCO", "BLOCO_DECISAO", "BLOCO_REPETICAO", "DECISAO"):
-                self.visit(c)
+        for c in branches:
+            self.visit(c)
 
     # LACO_DE_REPETICAO -> tung EXPRESSAO BLOCO
     def visit_LACO_DE_REPETICAO(self, node):
-        cond_type = None
+        expr = None
+        blocks = []
         for c in node.children:
             if c.symbol == "EXPRESSAO":
-                cond_type = self.visit(c)
-                break
+                if expr is None:
+                    expr = c
+            elif c.symbol == "BLOCO":
+                blocks.append(c)
+
+        cond_type = self.visit(expr)
         if cond_type is not None and cond_type != "porcoala":
             self.error(f"Condição do tung deve ser porcoala, recebido {cond_type}")
 
-        for c in node.children:
-            if c.symbol == "BLOCO":
-                self.visit(c)
+        for c in blocks:
+            self.visit(c)
 
     # ATRIBUICAO pode aparecer em 2 contextos na sua gramática:
     # 1) Em declaração: ATRIBUICAO -> '=' TERMO | '=' EXPRESSAO | ε
     # 2) Como comando: ATRIBUICAO -> TERMO '=' EXPRESSAO ';'
     def visit_ATRIBUICAO(self, node):
+        children = node.children
+        n = len(children)
         # caso epsilon
-        if len(node.children) == 0:
+        if n == 0:
             return None
 
         # tenta detectar forma: '=' X
-        if len(node.children) >= 2 and node.children[0].symbol == "=":
-            return self.visit(node.children[1])
+        if n >= 2 and children[0].symbol == "=":
+            return self.visit(children[1])
 
         # tenta detectar forma: TERMO '=' EXPRESSAO ';'
         # filhos típicos: [TERMO, '=', EXPRESSAO, ';']
-        if len(node.children) >= 3 and node.children[1].symbol == "=":
-            lhs_type = self.visit(node.children[0])
-            rhs_type = self.visit(node.children[2])
+        if n >= 3 and children[1].symbol == "=":
+            lhs = children[0]
+            lhs_type = self.visit(lhs)
+            rhs_type = self.visit(children[2])
 
             # lhs deve ser id declarado
-            if node.children[0].children and node.children[0].children[0].symbol == "id":
-                name = node.children[0].children[0].lexeme
+            if lhs.children and lhs.children[0].symbol == "id":
+                name = lhs.children[0].lexeme
                 sym = self.lookup(name)
                 if not sym:
                     self.error(f"Variável '{name}' não declarada (atribuição)")
@@ -222,19 +285,21 @@ class SemanticAnalyzer:
 
     # EXPRESSAO -> EXPRESSAO OPERADOR TERMO | TERMO
     def visit_EXPRESSAO(self, node):
-        if len(node.children) == 1:
-            node.type = self.visit(node.children[0])
+        children = node.children
+        visit = self.visit
+        if len(children) == 1:
+            node.type = visit(children[0])
             return node.type
 
         # padrão: [EXPRESSAO, OPERADOR, TERMO]
-        left_type = self.visit(node.children[0])
-        op_type = self.visit(node.children[1])  # 'arit'/'rel'/'log'
-        right_type = self.visit(node.children[2])
+        left_type = visit(children[0])
+        op_type = visit(children[1])  # 'arit'/'rel'/'log'
+        right_type = visit(children[2])
 
         if op_type == "arit":
             if left_type != right_type:
                 self.error("Tipos incompatíveis em operação aritmética")
-            if left_type not in ("tralalero", "tralala"):
+            if left_type not in _NUMERIC_TYPES:
                 self.error("Operação aritmética aplicada a tipo não numérico")
             node.type = left_type
             return node.type
@@ -261,14 +326,7 @@ class SemanticAnalyzer:
     def visit_OPERADOR(self, node):
         if not node.children:
             return None
-        child = node.children[0].symbol
-        if child == "OPERADOR_ARITMETICO":
-            return "arit"
-        if child == "OPERADOR_RELACIONAL":
-            return "rel"
-        if child == "OPERADOR_LOGICO":
-            return "log"
-        return None
+        return _OPERATOR_CATEGORY.get(node.children[0].symbol)
 
     # TERMO -> id | valor_inteiro | valor_real | VALOR_BOOL | caractere | string
     def visit_TERMO(self, node):
@@ -317,12 +375,13 @@ class SemanticAnalyzer:
         """
         Imprime a tabela de símbolos organizada por escopo
         """
-        print("\n📋 Tabela de Símbolos")
-        print("=" * 70)
+        lines = ["\n📋 Tabela de Símbolos", "=" * 70]
+        append = lines.append
         
         if not self.symbols:
-            print("  (vazia)")
-            print("=" * 70)
+            append("  (vazia)")
+            append("=" * 70)
+            sys.stdout.write("\n".join(lines) + "\n")
             return
         
         # Agrupa símbolos por escopo
@@ -332,11 +391,12 @@ class SemanticAnalyzer:
                 scopes[sym.scope] = []
             scopes[sym.scope].append(sym)
         
-        # Imprime cada escopo
+        # Monta cada escopo e escreve tudo de uma vez
         for scope_id in sorted(scopes.keys()):
             scope_label = "global" if scope_id == 0 else f"local {scope_id}"
-            print(f"\n  Escopo {scope_id} ({scope_label}):")
+            append(f"\n  Escopo {scope_id} ({scope_label}):")
             for sym in scopes[scope_id]:
-                print(f"    {sym.name:20} | tipo: {sym.tipo:15}")
+                append(f"    {sym.name:20} | tipo: {sym.tipo:15}")
         
-        print("\n" + "=" * 70)
\ No newline at end of file
+        append("\n" + "=" * 70)
+        sys.stdout.write("\n".join(lines) + "\n")
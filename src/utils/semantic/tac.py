@@ -1,13 +1,30 @@
+import sys
+
 from ..syntactic import DerivationNode
 
+# Nós que apenas agrupam comandos; são percorridos sem recursão por _walk
+_STRUCTURAL_SYMBOLS = frozenset({"PROGRAMA", "LISTA_DE_COMANDOS", "COMANDO",
+                                 "BLOCO", "BLOCO_DECISAO", "BLOCO_REPETICAO"})
+
+# folha de TERMO -> operando TAC, para as folhas que não usam o lexema direto
+_TERMO_FORMAT = {
+    "tripi": lambda leaf: "true",
+    "tropa": lambda leaf: "false",
+    "caractere": lambda leaf: f"'{leaf.lexeme}'",
+    "string": lambda leaf: f'"{leaf.lexeme}"',
+}
+
 class TACGenerator:
     """Gerador de Código de 3 Endereços (Three Address Code)"""
     
-    def __init__(self):
+    def __init__(self, debug: bool = False):
+        self.debug = debug  # lista o TAC gerado ao fim de generate()
         self.instructions: list[str] = []
         self.temp_count = 0
         self.label_count = 0
         self.symbols = None  # Referência à tabela de símbolos
+        # (temporário, índice da instrução que o define, lado direito) do último tN = a op b
+        self.last_temp_def: tuple[str, int, str] | None = None
     
     def new_temp(self) -> str:
         """Gera novo temporário: t1, t2, t3..."""
@@ -22,18 +39,35 @@ class TACGenerator:
     def emit(self, instruction: str):
         """Emite uma instrução TAC"""
         self.instructions.append(instruction)
-        #print(f"  {len(self.instructions):3d}. {instruction}")
+    
+    def emit_copy(self, var_name: str, value: str, start: int):
+        """
+        Emite 'var = valor'. Se o valor é o temporário definido pela expressão
+        desta atribuição (instrução de índice >= start, registrada em
+        last_temp_def), reescreve essa instrução como 'var = a op b' em vez de
+        gerar a cópia 'var = tN'.
+        """
+        last = self.last_temp_def
+        if last is not None and last[0] == value and last[1] >= start:
+            _, index, rhs = last
+            self.instructions[index] = f"{var_name} = {rhs}"
+            self.last_temp_def = None
+        else:
+            self.emit(f"{var_name} = {value}")
     
     def generate(self, root: DerivationNode, symbols_from_analyzer) -> list[str]:
         """Gera código TAC a partir da árvore"""
         self.symbols = symbols_from_analyzer
         
-        #print("\n🔨 Gerando Código de 3 Endereços")
-        #print("=" * 70)
-        
         self.visit(root)
         
-        #print("=" * 70)
+        if self.debug:
+            # uma única escrita com a listagem numerada, fora do caminho quente de emit
+            lines = ["\n🔨 Gerando Código de 3 Endereços", "=" * 70]
+            lines.extend(f"  {i:3d}. {instr}" for i, instr in enumerate(self.instructions, 1))
+            lines.append("=" * 70)
+            sys.stdout.write("\n".join(lines) + "\n")
+        
         return self.instructions
     
     def visit(self, node):
@@ -41,29 +75,46 @@ class TACGenerator:
         if node is None:
             return None
         
-        method = getattr(self, f"visit_{node.symbol}", self.generic_visit)
-        return method(node)
+        # cache símbolo -> função visit_<símbolo>, próprio de cada (sub)classe
+        cls = type(self)
+        cache = cls.__dict__.get("_dispatch_cache")
+        if cache is None:
+            cache = {}
+            cls._dispatch_cache = cache
+        method = cache.get(node.symbol)
+        if method is None:
+            method = getattr(cls, "visit_" + node.symbol, cls.generic_visit)
+            cache[node.symbol] = method
+        return method(self, node)
     
     def generic_visit(self, node):
         """Fallback: visita filhos"""
         result = None
-        for c in getattr(node, "children", []):
+        for c in node.children:
             result = self.visit(c)
         return result
     
+    def _walk(self, node):
+        """Percorre os nós estruturais com pilha explícita (pré-ordem), sem um frame por comando"""
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n.symbol in _STRUCTURAL_SYMBOLS:
+                stack.extend(reversed(n.children))
+            elif not n.is_terminal:
+                # folhas (';', delimitadores...) não têm regra: nem passam por visit
+                self.visit(n)
+    
     # ===== MÉTODOS PARA CADA TIPO DE NÓ =====
     
     def visit_PROGRAMA(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
     
     def visit_LISTA_DE_COMANDOS(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
     
     def visit_COMANDO(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
     
     def visit_DECLARACAO(self, node):
         """
@@ -84,19 +135,21 @@ class TACGenerator:
         if atrib_node and var_name:
             # ATRIBUICAO em contexto de DECLARACAO é: '=' EXPRESSAO | '=' TERMO
             expr_value = None
+            start = len(self.instructions)
             for c in atrib_node.children:
                 if c.symbol in ("EXPRESSAO", "TERMO"):
                     expr_value = self.visit(c)
                     break
             
             if expr_value:
-                self.emit(f"{var_name} = {expr_value}")
+                self.emit_copy(var_name, expr_value, start)
     
     def visit_ATRIBUICAO(self, node):
         """ATRIBUICAO -> TERMO '=' EXPRESSAO ';'"""
         # Extrai identificador (lhs)
         var_name = None
         expr_value = None
+        start = len(self.instructions)
         
         for i, c in enumerate(node.children):
             if c.symbol == "TERMO" and i == 0:
@@ -108,29 +161,37 @@ class TACGenerator:
                 expr_value = self.visit(c)
         
         if var_name and expr_value:
-            self.emit(f"{var_name} = {expr_value}")
+            self.emit_copy(var_name, expr_value, start)
         
         return var_name
     
     def visit_EXPRESSAO(self, node):
         """EXPRESSAO -> EXPRESSAO OPERADOR TERMO | TERMO"""
         
-        if len(node.children) == 1:
-            # Simples: apenas um TERMO
-            return self.visit(node.children[0])
+        # A gramática é recursiva à esquerda: desce pela espinha guardando os
+        # pares (OPERADOR, TERMO) e depois dobra da esquerda para a direita,
+        # sem uma chamada recursiva por operador.
+        spine = []
+        while len(node.children) == 3 and node.children[0].symbol == "EXPRESSAO":
+            spine.append((node.children[1], node.children[2]))
+            node = node.children[0]
         
-        elif len(node.children) == 3:
-            # Binária: EXPRESSAO OPERADOR TERMO
-            left = self.visit(node.children[0])      # Expressão esquerda
-            op = self._extract_operator(node.children[1])  # Operador
-            right = self.visit(node.children[2])     # TERMO direita
+        # Simples: apenas um TERMO
+        result = self.visit(node.children[0]) if len(node.children) == 1 else None
+        
+        # Binária: EXPRESSAO OPERADOR TERMO
+        for op_node, term in reversed(spine):
+            op = self._extract_operator(op_node)  # Operador
+            right = self.visit(term)              # TERMO direita
             
             # Gera temporário para o resultado
-            result = self.new_temp()
-            self.emit(f"{result} = {left} {op} {right}")
-            return result
+            temp = self.new_temp()
+            rhs = f"{result} {op} {right}"
+            self.emit(f"{temp} = {rhs}")
+            self.last_temp_def = (temp, len(self.instructions) - 1, rhs)
+            result = temp
         
-        return None
+        return result
     
     def visit_TERMO(self, node):
         """TERMO -> id | valor_inteiro | valor_real | ..."""
@@ -139,20 +200,9 @@ class TACGenerator:
         
         leaf = node.children[0]
         
-        if leaf.symbol == "id":
-            return leaf.lexeme
-        elif leaf.symbol == "valor_inteiro":
-            return leaf.lexeme
-        elif leaf.symbol == "valor_real":
-            return leaf.lexeme
-        elif leaf.symbol in ("tripi", "tropa"):
-            return "true" if leaf.symbol == "tripi" else "false"
-        elif leaf.symbol == "caractere":
-            return f"'{leaf.lexeme}'"
-        elif leaf.symbol == "string":
-            return f'"{leaf.lexeme}"'
-        
-        return leaf.lexeme
+        # id, valor_inteiro, valor_real e o resto usam o próprio lexema
+        fmt = _TERMO_FORMAT.get(leaf.symbol)
+        return fmt(leaf) if fmt else leaf.lexeme
     
     def visit_ENTRADA(self, node):
         """ENTRADA -> batapim id ;"""
@@ -172,38 +222,43 @@ class TACGenerator:
     
     def visit_DECISAO(self, node):
         """DECISAO -> lirili EXPRESSAO BLOCO [larila BLOCO]"""
+        # Uma passada pelos filhos: condição e blocos then/else
+        expr = None
+        blocks = []
+        for c in node.children:
+            sym = c.symbol
+            if sym == "EXPRESSAO":
+                if expr is None:
+                    expr = c
+            elif sym in ("BLOCO", "BLOCO_DECISAO"):
+                blocks.append(c)
+        has_else = len(blocks) > 1
+        
         label_else = self.new_label()
-        label_end = self.new_label()
+        # sem else, o rótulo else já é o fim: nada de 'goto fim' logo antes de 'fim:'
+        label_end = self.new_label() if has_else else None
         
         # Avalia condição
-        cond = None
-        for c in node.children:
-            if c.symbol == "EXPRESSAO":
-                cond = self.visit(c)
-                break
+        cond = self.visit(expr)
         
         # if not cond goto else
         self.emit(f"if_not {cond} goto {label_else}")
         
         # Bloco then
-        for c in node.children:
-            if c.symbol in ("BLOCO", "BLOCO_DECISAO"):
-                self.visit(c)
-                break
+        if blocks:
+            self.visit(blocks[0])
         
-        self.emit(f"goto {label_end}")
+        if has_else:
+            self.emit(f"goto {label_end}")
         
         # Rótulo else
         self.emit(f"{label_else}:")
         
         # Bloco else (se existir)
-        blocks = [c for c in node.children 
-                 if c.symbol in ("BLOCO", "BLOCO_DECISAO")]
-        if len(blocks) > 1:
+        if has_else:
             self.visit(blocks[1])
-        
-        # Rótulo fim
-        self.emit(f"{label_end}:")
+            # Rótulo fim
+            self.emit(f"{label_end}:")
     
     def visit_LACO_DE_REPETICAO(self, node):
         """LACO_DE_REPETICAO -> tung EXPRESSAO BLOCO"""
@@ -213,21 +268,26 @@ class TACGenerator:
         # Rótulo início do loop
         self.emit(f"{label_loop}:")
         
-        # Condição
-        cond = None
+        # Uma passada pelos filhos: condição e corpo
+        expr = None
+        body = None
         for c in node.children:
-            if c.symbol == "EXPRESSAO":
-                cond = self.visit(c)
-                break
+            sym = c.symbol
+            if sym == "EXPRESSAO":
+                if expr is None:
+                    expr = c
+            elif sym in ("BLOCO", "BLOCO_REPETICAO"):
+                if body is None:
+                    body = c
+        
+        # Condição
+        cond = self.visit(expr)
         
         # if not cond goto end
         self.emit(f"if_not {cond} goto {label_end}")
         
         # Corpo do loop
-        for c in node.children:
-            if c.symbol in ("BLOCO", "BLOCO_REPETICAO"):
-                self.visit(c)
-                break
+        self.visit(body)
         
         # Volta ao início
         self.emit(f"goto {label_loop}")
@@ -236,16 +296,13 @@ class TACGenerator:
         self.emit(f"{label_end}:")
     
     def visit_BLOCO(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
     
     def visit_BLOCO_DECISAO(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
     
     def visit_BLOCO_REPETICAO(self, node):
-        for c in node.children:
-            self.visit(c)
+        self._walk(node)
     
     def _extract_operator(self, op_node) -> str:
         """Extrai o símbolo do operador"""
@@ -253,4 +310,4 @@ class TACGenerator:
             child = op_node.children[0]
             if child.children:
                 return child.children[0].lexeme
-        return "?"
\ No newline at end of file
+        return "?"
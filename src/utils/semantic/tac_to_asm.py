@@ -4,19 +4,70 @@ Gera um .s com variáveis/temporários na seção .data e código em .text.
 Compatível com gcc/clang (MinGW) na ABI Microsoft x64.
 """
 
+import functools
 import re
+from collections import Counter
+from itertools import chain
 from pathlib import Path
-from typing import Iterable, List, Tuple, Set
+from typing import Iterable, List, Tuple
 
-BIN_OPS = {"+": "add", "-": "sub", "*": "imul", "/": "idiv",
-           "==": "seteq", "!=": "setne", "<": "setl", ">": "setg",
+# operador relacional -> instrução setcc
+SET_OPS = {"==": "sete", "!=": "setne", "<": "setl", ">": "setg",
            "<=": "setle", ">=": "setge"}
+# setcc da comparação -> salto tomado quando ela é falsa (if_not)
+INVERSE_JUMPS = {"sete": "jne", "setne": "je", "setl": "jge", "setg": "jle",
+                 "setle": "jg", "setge": "jl"}
+# operador aritmético simples -> instrução
+ARITH_OPS = {"+": "add", "-": "sub", "*": "imul"}
+
+# regexes compiladas uma única vez
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_BINOP_RE = re.compile(r"(.+) ([+\-*/]|==|!=|<=|>=|<|>) (.+)")
+_RIP_REF_RE = re.compile(r"\[rip\+([A-Za-z_][A-Za-z0-9_]*)\]")
 
 
 def parse_tac_lines(lines: Iterable[str]) -> List[str]:
     return [ln.strip() for ln in lines if ln.strip()]
 
 
+def parse_tac_instruction(ln: str) -> Tuple | None:
+    """
+    Converte uma linha de TAC em uma tupla (tipo, operandos...), analisada uma
+    única vez antes da tradução:
+        ("label", nome) | ("goto", rótulo) | ("if_not", cond, rótulo)
+        ("output", arg) | ("input", dest) | ("bin", dest, a, op, b) | ("copy", dest, src)
+    Retorna None para linhas que não geram código.
+    """
+    if not ln:
+        return None
+    if ln.endswith(":"):
+        return ("label", ln[:-1])
+    if ln.startswith("goto"):
+        _, label = ln.split()
+        return ("goto", label)
+    if ln.startswith("if_not"):
+        parts = ln.split()
+        return ("if_not", parts[1], parts[-1])
+    if ln.startswith("output"):
+        inside = ln[ln.find("(") + 1: ln.rfind(")")]
+        return ("output", inside.strip())
+    if "input()" in ln:
+        return ("input", ln.split("=")[0].strip())
+    # assignment forms
+    if "=" in ln:
+        lhs, rhs = ln.split("=", 1)
+        lhs = lhs.strip()
+        rhs = rhs.strip()
+        # binary op?
+        m = _BINOP_RE.match(rhs)
+        if m:
+            a, op, b = m.groups()
+            return ("bin", lhs, a.strip(), op.strip(), b.strip())
+        # simple move
+        return ("copy", lhs, rhs)
+    return None
+
+
 def is_string_literal(token: str) -> bool:
     return len(token) >= 2 and token.startswith("\"") and token.endswith("\"")
 
@@ -32,36 +83,56 @@ def canonical_string_literal(token: str) -> str:
     return f'"{inner}"'
 
 
-def collect_symbols(tac: List[str]) -> Tuple[Set[str], Set[str]]:
-    vars_set, temps_set = set(), set()
-    token_re = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
-    for ln in tac:
-        if ln.endswith(":"):
+def output_string_literal(ln: str) -> str | None:
+    """Literal de string (canônico) impresso por uma linha output(...), ou None."""
+    if not ln.startswith("output"):
+        return None
+    inside = ln[ln.find("(") + 1: ln.rfind(")")].strip()
+    return canonical_string_literal(inside) if is_string_literal(inside) else None
+
+
+def collect_line_symbols(ln: str, vars_set: dict[str, None], temps_set: dict[str, None]) -> None:
+    """
+    Acrescenta a vars_set/temps_set as variáveis e temporários usados em uma
+    linha de TAC. São dicts usados como conjuntos ordenados por primeira ocorrência.
+    """
+    if ln.endswith(":"):
+        return
+    # palavras dentro de um literal de string não são variáveis
+    if output_string_literal(ln) is not None:
+        return
+    # lhs = ...
+    if "=" in ln and not ln.startswith("if_not") and not ln.startswith("goto"):
+        lhs = ln.split("=", 1)[0].strip()
+        if lhs.startswith("t"):
+            temps_set[lhs] = None
+        else:
+            vars_set[lhs] = None
+    # rhs identifiers
+    for tok in _TOKEN_RE.findall(ln):
+        if tok in {"if_not", "goto", "output", "input"}:
             continue
-        # lhs = ...
-        if "=" in ln and not ln.startswith("if_not") and not ln.startswith("goto"):
-            lhs = ln.split("=", 1)[0].strip()
-            if lhs.startswith("t"):
-                temps_set.add(lhs)
-            else:
-                vars_set.add(lhs)
-        # rhs identifiers
-        for tok in token_re.findall(ln):
-            if tok in {"if_not", "goto", "output", "input"}:
-                continue
-            if tok.startswith("L"):
-                continue
-            if is_string_literal(tok):
-                continue
-            if tok.startswith("t"):
-                temps_set.add(tok)
-            elif tok.isidentifier() and not tok.isnumeric():
-                vars_set.add(tok)
+        if tok.startswith("L"):
+            continue
+        if is_string_literal(tok):
+            continue
+        if tok.startswith("t"):
+            temps_set[tok] = None
+        elif tok.isidentifier() and not tok.isnumeric():
+            vars_set[tok] = None
+
+
+def collect_symbols(tac: List[str]) -> Tuple[dict[str, None], dict[str, None]]:
+    vars_set, temps_set = {}, {}
+    for ln in tac:
+        collect_line_symbols(ln, vars_set, temps_set)
     return vars_set, temps_set
 
 
 def is_int_literal(token: str) -> bool:
-    return re.fullmatch(r"-?\d+", token) is not None
+    # equivale a -?\d+ (isdecimal aceita os mesmos dígitos Unicode que \d)
+    digits = token[1:] if token[:1] == "-" else token
+    return digits.isdecimal()
 
 
 def emit_prologue() -> List[str]:
@@ -78,14 +149,15 @@ def emit_prologue() -> List[str]:
     ]
 
 
-def emit_data(vars_set: Set[str], temps_set: Set[str], str_labels: dict[str, str]) -> List[str]:
+def emit_data(vars_set: Iterable[str], temps_set: Iterable[str], str_labels: dict[str, str]) -> List[str]:
     out = [
         ".section .data",
         "fmt_in: .string \"%ld\"",
         "fmt_out: .string \"%ld\\n\"",
         "fmt_str: .string \"%s\\n\"",
     ]
-    for name in sorted(vars_set | temps_set):
+    # variáveis e depois temporários, na ordem em que aparecem no TAC (sem sort)
+    for name in dict.fromkeys(chain(vars_set, temps_set)):
         out.append(f"{name}: .quad 0")
     for literal, label in str_labels.items():
         # strip outer quotes and escape inner quotes/backslashes
@@ -108,152 +180,174 @@ def emit_text_prologue() -> List[str]:
     ]
 
 
-def load_operand(op: str, target: str = "rax") -> List[str]:
+# O TAC usa as mesmas variáveis muitas vezes: as linhas de load/store de cada
+# (operando, registrador) são formatadas uma vez e reaproveitadas.
+@functools.lru_cache(maxsize=4096)
+def _load_lines(op: str, target: str) -> Tuple[str, ...]:
     if is_int_literal(op):
-        return [f"    mov {target}, {op}"]
+        return (f"    mov {target}, {op}",)
     # RIP-relative addressing for x64
-    return [
-        f"    lea rbx, [rip+{op}]",
-        f"    mov {target}, [rbx]",
-    ]
+    return (f"    mov {target}, [rip+{op}]",)
 
 
-def store_dest(dest: str, src: str = "rax") -> List[str]:
-    return [
-        f"    lea rbx, [rip+{dest}]",
-        f"    mov [rbx], {src}",
-    ]
+@functools.lru_cache(maxsize=4096)
+def _store_lines(dest: str, src: str) -> Tuple[str, ...]:
+    return (f"    mov [rip+{dest}], {src}",)
+
+
+def load_operand(out: List[str], op: str, target: str = "rax") -> None:
+    out.extend(_load_lines(op, target))
+
+
+def store_dest(out: List[str], dest: str, src: str = "rax") -> None:
+    out.extend(_store_lines(dest, src))
+
 
+def is_imm32(token: str) -> bool:
+    """Literal inteiro que cabe no imediato de 32 bits (com sinal) de add/sub/imul/cmp."""
+    return is_int_literal(token) and -2**31 <= int(token) < 2**31
 
-def emit_binary(dest: str, a: str, op: str, b: str) -> List[str]:
-    lines: List[str] = []
-    lines += load_operand(a, "rax")
+
+def emit_binary(out: List[str], dest: str, a: str, op: str, b: str) -> None:
+    load_operand(out, a, "rax")
     if op == "/":
         # idiv usa rdx:rax
-        lines.append("    cqo")
-        lines += load_operand(b, "rbx")
-        lines.append("    idiv rbx")
-        lines += store_dest(dest, "rax")
-        return lines
-    if op in {"==", "!=", "<", ">", "<=", ">="}:
-        lines += load_operand(b, "rbx")
-        lines.append("    cmp rax, rbx")
-        set_map = {
-            "==": "sete", "!=": "setne", "<": "setl", ">": "setg",
-            "<=": "setle", ">=": "setge",
-        }
-        lines.append(f"    {set_map[op]} al")
-        lines.append("    movzx rax, al")
-        lines += store_dest(dest, "rax")
-        return lines
+        out.append("    cqo")
+        load_operand(out, b, "rbx")
+        out.append("    idiv rbx")
+        store_dest(out, dest, "rax")
+        return
+    # literal pequeno vai direto como imediato, sem passar por rbx
+    if is_imm32(b):
+        rhs = b
+    else:
+        load_operand(out, b, "rbx")
+        rhs = "rbx"
+    set_op = SET_OPS.get(op)
+    if set_op:
+        out.append(f"    cmp rax, {rhs}")
+        out.append(f"    {set_op} al")
+        # escrita de 32 bits zera a metade alta de rax (sem REX, sem dependência parcial)
+        out.append("    movzx eax, al")
+        store_dest(out, dest, "rax")
+        return
     # aritméticos simples
-    lines += load_operand(b, "rbx")
-    op_map = {"+": "add", "-": "sub", "*": "imul"}
-    asm_op = op_map.get(op)
+    asm_op = ARITH_OPS.get(op)
     if asm_op:
-        lines.append(f"    {asm_op} rax, rbx")
-    lines += store_dest(dest, "rax")
-    return lines
+        out.append(f"    {asm_op} rax, {rhs}")
+    store_dest(out, dest, "rax")
+
 
+def emit_copy(out: List[str], dest: str, src: str) -> None:
+    load_operand(out, src, "rax")
+    store_dest(out, dest, "rax")
 
-def emit_if_not(cond: str, label: str) -> List[str]:
-    return load_operand(cond, "rax") + ["    cmp rax, 0", f"    je {label}"]
 
+def emit_if_not(out: List[str], cond: str, label: str) -> None:
+    load_operand(out, cond, "rax")
+    out.append("    cmp rax, 0")
+    out.append(f"    je {label}")
 
-def emit_goto(label: str) -> List[str]:
-    return [f"    jmp {label}"]
 
+def emit_goto(out: List[str], label: str) -> None:
+    out.append(f"    jmp {label}")
 
-def emit_output(op: str, str_labels: dict[str, str]) -> List[str]:
+
+def emit_output(out: List[str], op: str, str_labels: dict[str, str]) -> None:
     # MS x64: rcx, rdx, r8, r9
     if is_string_literal(op):
         key = canonical_string_literal(op)
         label = str_labels[key]
-        return [
-            f"    lea rdx, [rip+{label}]",
-            "    lea rcx, [rip+fmt_str]",
-            "    xor eax, eax   # printf variadic: clear al",
-            "    call printf",
-        ]
-    lines = load_operand(op, "rdx")
-    lines.append("    lea rcx, [rip+fmt_out]")
-    lines.append("    xor eax, eax   # printf variadic: clear al")
-    lines.append("    call printf")
-    return lines
+        out.append(f"    lea rdx, [rip+{label}]")
+        out.append("    lea rcx, [rip+fmt_str]")
+    else:
+        load_operand(out, op, "rdx")
+        out.append("    lea rcx, [rip+fmt_out]")
+    out.append("    xor eax, eax   # printf variadic: clear al")
+    out.append("    call printf")
 
 
-def emit_input(dest: str) -> List[str]:
+def emit_input(out: List[str], dest: str) -> None:
     # scanf(fmt_in, &dest) -> rcx=fmt, rdx=&dest
-    return [
-        f"    lea rdx, [rip+{dest}]",
-        "    lea rcx, [rip+fmt_in]",
-        "    xor eax, eax",
-        "    call scanf",
-    ]
+    out.append(f"    lea rdx, [rip+{dest}]")
+    out.append("    lea rcx, [rip+fmt_in]")
+    out.append("    xor eax, eax")
+    out.append("    call scanf")
+
+
+def peephole(text: List[str]) -> List[str]:
+    """
+    Mantém valores em rax entre instruções TAC consecutivas: quando um store de
+    rax em X é seguido pelo load de X em rax, o load sai; se X não é
+    referenciado em nenhum outro ponto (temporário de uso único), o store também.
+    Um booleano de comparação testado logo em seguida por if_not vira cmp + jcc.
+    """
+    refs = Counter(name for ln in text for name in _RIP_REF_RE.findall(ln))
+    out: List[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        ln = text[i]
+        if (i + 1 < n and ln.startswith("    mov [rip+") and ln.endswith("], rax")):
+            name = ln[13:-6]
+            if text[i + 1] == f"    mov rax, [rip+{name}]":
+                if refs[name] > 2:
+                    out.append(ln)
+                i += 2
+                continue
+        # cmp; setcc al; movzx eax, al; cmp rax, 0; je L  ->  cmp; j<inverso> L
+        if (ln == "    cmp rax, 0" and i + 1 < n and text[i + 1].startswith("    je ")
+                and len(out) >= 2 and out[-1] == "    movzx eax, al"):
+            jump = INVERSE_JUMPS.get(out[-2].split()[0])
+            if jump:
+                del out[-2:]
+                out.append(f"    {jump} {text[i + 1][7:]}")
+                i += 2
+                continue
+        out.append(ln)
+        i += 1
+    return out
+
+
+# tipo da instrução TAC -> tradutor (out, instr, str_labels), que acrescenta o assembly em out
+_TRANSLATORS = {
+    "label": lambda out, instr, str_labels: out.append(f"{instr[1]}:"),
+    "goto": lambda out, instr, str_labels: emit_goto(out, instr[1]),
+    "if_not": lambda out, instr, str_labels: emit_if_not(out, instr[1], instr[2]),
+    "output": lambda out, instr, str_labels: emit_output(out, instr[1], str_labels),
+    "input": lambda out, instr, str_labels: emit_input(out, instr[1]),
+    "bin": lambda out, instr, str_labels: emit_binary(out, *instr[1:]),
+    "copy": lambda out, instr, str_labels: emit_copy(out, instr[1], instr[2]),
+}
 
 
 def translate_tac(tac: List[str]) -> List[str]:
-    lines: List[str] = []
-    vars_set, temps_set = collect_symbols(tac)
-    # coleta literais de string
-    str_literals: List[str] = []
-    # Captura literais de string, tolerando aspas duplicadas
-    str_re = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+    # Uma única passada pelo TAC: coleta variáveis/temporários e literais de
+    # string enquanto traduz o .text; a seção .data é montada no fim, depois do peephole.
+    vars_set: dict[str, None] = {}
+    temps_set: dict[str, None] = {}
+    str_labels: dict[str, str] = {}
+    text: List[str] = []
     for ln in tac:
-        str_literals.extend(canonical_string_literal(m) for m in str_re.findall(ln))
-        # garante captura em output(...) mesmo que regex falhe em casos estranhos
-        if ln.startswith("output") and "(" in ln and ")" in ln:
-            inside = ln[ln.find("(") + 1: ln.rfind(")")].strip()
-            if is_string_literal(inside):
-                str_literals.append(canonical_string_literal(inside))
-    str_labels = {lit: f"str_{i}" for i, lit in enumerate(dict.fromkeys(str_literals))}
-
-    lines += emit_prologue()
-    lines += emit_data(vars_set, temps_set, str_labels)
+        # o gerador só produz literais de string dentro de output(...)
+        lit = output_string_literal(ln)
+        if lit is None:
+            collect_line_symbols(ln, vars_set, temps_set)
+        elif lit not in str_labels:
+            str_labels[lit] = f"str_{len(str_labels)}"
+
+        instr = parse_tac_instruction(ln)
+        if instr is not None:
+            _TRANSLATORS[instr[0]](text, instr, str_labels)
+
+    text = peephole(text)
+    # temporários cujos loads/stores o peephole removeu por completo não ganham slot em .data
+    referenced = {name for ln in text for name in _RIP_REF_RE.findall(ln)}
+    temps = [name for name in temps_set if name in referenced]
+
+    lines = emit_prologue()
+    lines += emit_data(vars_set, temps, str_labels)
     lines += emit_text_prologue()
-
-    for ln in tac:
-        if not ln:
-            continue
-        if ln.endswith(":"):
-            lines.append(ln)  # label
-            continue
-        if ln.startswith("goto"):
-            _, label = ln.split()
-            lines += emit_goto(label)
-            continue
-        if ln.startswith("if_not"):
-            parts = ln.split()
-            cond = parts[1]
-            label = parts[-1]
-            lines += emit_if_not(cond, label)
-            continue
-        if ln.startswith("output"):
-            inside = ln[ln.find("(") + 1: ln.rfind(")")]
-            lines += emit_output(inside.strip(), str_labels)
-            continue
-        if "input()" in ln:
-            dest = ln.split("=")[0].strip()
-            lines += emit_input(dest)
-            continue
-        # assignment forms
-        if "=" in ln:
-            lhs, rhs = ln.split("=", 1)
-            lhs = lhs.strip()
-            rhs = rhs.strip()
-            # binary op?
-            m = re.match(r"(.+) ([+\-*/]|==|!=|<=|>=|<|>) (.+)", rhs)
-            if m:
-                a, op, b = m.groups()
-                lines += emit_binary(lhs, a.strip(), op.strip(), b.strip())
-            else:
-                # simple move
-                if is_int_literal(rhs):
-                    lines.append(f"    mov rax, {rhs}")
-                else:
-                    lines += load_operand(rhs, "rax")
-                lines += store_dest(lhs, "rax")
-            continue
+    lines += text
     # epílogo
     lines += ["", "    mov rsp, rbp", "    pop rbp", "    mov eax, 0", "    ret"]
     return lines
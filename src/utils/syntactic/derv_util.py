@@ -1,11 +1,15 @@
 """
 Modulo para funções relacionadas à derivação de cadeias em uma gramática livre de contexto (CFG).
 """
-import pprint, csv
-from .gramatica_util import gramatica, ENDMARK, EPS, ALL_NONTERMINALS
+import sys
+from collections import deque
+from itertools import chain
+from .gramatica_util import gramatica, ENDMARK, EPS, ALL_TERMINALS, PROD_LHS, PROD_RHS, PROD_LEN
 
 class DerivationNode:
     """Classe para representar um nó na árvore de derivação"""
+    __slots__ = ("symbol", "lexeme", "state", "line", "depth", "parent", "children", "type", "is_terminal")
+
     def __init__(self, symbol, lexeme=None, state=None, depth=0, parent=None, line=None):
         self.symbol = symbol
         self.lexeme = lexeme  # Para terminais, armazena o valor original
@@ -13,13 +17,17 @@ class DerivationNode:
         self.line = line  # Linha do código-fonte
         self.depth = depth
         self.parent = parent
-        self.children = []
-        self.is_terminal = symbol not in gramatica and symbol not in ALL_NONTERMINALS
+        self.children = ()  # tupla vazia compartilhada; vira lista só no primeiro add_child
+        self.type = None  # Tipo anotado pela análise semântica
+        self.is_terminal = symbol in ALL_TERMINALS
     
     def add_child(self, child_node):
         """Adiciona um filho ao nó"""
         child_node.parent = self
-        self.children.append(child_node)
+        if self.children:
+            self.children.append(child_node)
+        else:
+            self.children = [child_node]
     
     def __str__(self):
         if self.lexeme and self.lexeme != self.symbol:
@@ -28,21 +36,21 @@ class DerivationNode:
 
 class DerivationTree:
     """Classe para gerenciar a árvore de derivação bottom-up"""
+    __slots__ = ("root", "node_stack")
+
     def __init__(self):
         self.root = None
         self.node_stack = []  # Pilha de nós correspondente à pilha do parser
-        self.all_nodes = []   # Todos os nós criados
     def shift_terminal(self, symbol, lexeme=None, state=None, line=None):
         """Cria nó terminal durante SHIFT"""
         terminal_node = DerivationNode(symbol, lexeme, state, line=line)
         self.node_stack.append(terminal_node)
-        self.all_nodes.append(terminal_node)
         return terminal_node
     def reduce_production(self, lhs, rhs, new_state=None):
         """Cria nó não-terminal durante REDUCE, conectando aos filhos"""
         # Remove os nós filhos da pilha (correspondente aos símbolos da produção)
         children_nodes = []
-        if rhs != ['ε']:  # Se não é produção vazia
+        if rhs != (EPS,):  # Se não é produção vazia (PROD_RHS guarda tuplas)
             # Remove tantos nós quantos símbolos na produção
             for _ in range(len(rhs)):
                 if self.node_stack:
@@ -56,9 +64,9 @@ class DerivationTree:
             parent_node.add_child(child)
         # Adiciona o novo nó à pilha
         self.node_stack.append(parent_node)
-        self.all_nodes.append(parent_node)
-        # Se chegamos ao símbolo inicial, esta é a raiz
-        if lhs == 'PROGRAMA' or (len(self.node_stack) == 1 and not any(n.parent for n in self.node_stack)):
+        # Se chegamos ao símbolo inicial, esta é a raiz; nós da pilha nunca têm
+        # pai, então basta olhar o tamanho da pilha
+        if lhs == 'PROGRAMA' or len(self.node_stack) == 1:
             self.root = parent_node
         
         return parent_node
@@ -72,37 +80,58 @@ class DerivationTree:
             else:
                 print("❌ Árvore vazia")
                 return
-        print("📊 Árvore de Derivação (Bottom-Up):")
-        print("=" * 60)
-        self._print_node(self.root, "", True, True)
-        print("=" * 60)
+        lines = ["📊 Árvore de Derivação (Bottom-Up):", "=" * 60]
+        lines += self._render_lines(self.root)
+        lines.append("=" * 60)
+        sys.stdout.write("\n".join(lines) + "\n")
     
-    def _print_node(self, node, prefix, is_last, is_root):
-        """Função auxiliar para imprimir um nó com formatação de árvore"""
-        # Mostra o símbolo e, se for terminal, o lexema
-        display_text = str(node)
-        if is_root:
-            print(f"{display_text}")
-        else:
-            connector = "└───" if is_last else "├───"
-            print(f"{prefix}{connector}{display_text}")
-        # Prepara o prefixo para os filhos
-        if not is_root:
-            child_prefix = prefix + ("    " if is_last else "│   ")
-        else:
-            child_prefix = ""
-        # Imprime os filhos
-        for i, child in enumerate(node.children):
-            is_last_child = (i == len(node.children) - 1)
-            self._print_node(child, child_prefix, is_last_child, False)
+    def _render_lines(self, node, prefix="", is_last=True, is_root=True):
+        """Gera as linhas da subárvore com formatação de árvore, com pilha explícita (sem recursão)"""
+        lines = []
+        stack = [(node, prefix, is_last, is_root)]
+        while stack:
+            node, prefix, is_last, is_root = stack.pop()
+            # Mostra o símbolo e, se for terminal, o lexema
+            display_text = str(node)
+            if is_root:
+                lines.append(display_text)
+                child_prefix = ""
+            else:
+                connector = "└───" if is_last else "├───"
+                lines.append(f"{prefix}{connector}{display_text}")
+                child_prefix = prefix + ("    " if is_last else "│   ")
+            # Empilha os filhos ao contrário para saírem na ordem original
+            children = node.children
+            last = len(children) - 1
+            for i in range(last, -1, -1):
+                stack.append((children[i], child_prefix, i == last, False))
+        return lines
     
+    def all_nodes(self):
+        """Retorna todos os nós na ordem em que foram criados (pós-ordem da floresta da pilha)"""
+        nodes = []
+        stack = [(node, False) for node in reversed(self.node_stack)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                nodes.append(node)
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+        return nodes
+
+    def _write_node_to_file(self, node, prefix, is_last, is_root, file):
+        """Escreve um nó no arquivo com formatação de árvore"""
+        file.write("".join(f"{line}\n" for line in self._render_lines(node, prefix, is_last, is_root)))
+
     def print_bottom_up_steps(self):
         """Imprime os passos da derivação bottom-up"""
         print("\n📝 Passos da Análise Bottom-Up:")
         #print("-" * 50)
         # Coleta terminais na ordem que foram processados
-        terminals = [node for node in self.all_nodes if node.is_terminal]
-        non_terminals = [node for node in self.all_nodes if not node.is_terminal]
+        all_nodes = self.all_nodes()
+        terminals = [node for node in all_nodes if node.is_terminal]
+        non_terminals = [node for node in all_nodes if not node.is_terminal]
         print("1️⃣ Terminais reconhecidos (SHIFT):")
         for i, terminal in enumerate(terminals):
             lexeme_part = f" <- '{terminal.lexeme}'" if terminal.lexeme else ""
@@ -135,163 +164,248 @@ def read_tuples(tuples_list: list) -> tuple[list, list]:
             token_tuples[i] = (token[1], token[1])
     return token_tuples, line_list
 
-def parse(token_tuples: list, line_list: list, slr_dict: dict) -> tuple[bool, list, DerivationTree, list]:
-    """Função para analisar uma lista de tuplas de tokens usando um dicionário SLR."""
+# Códigos das células da tabela SLR depois de decodificadas para (op, arg)
+ACT_EMPTY, ACT_SHIFT, ACT_REDUCE, ACT_ERROR, ACT_ACCEPT, ACT_GOTO, ACT_UNKNOWN = range(7)
+
+def decode_slr_cell(cell: str) -> tuple[int, int]:
+    """
+    Decodifica uma célula da tabela SLR ('sN', 'rN', 'error', 'acc', goto 'N' ou '')
+
+    :param cell: célula no formato de build_slr_table
+    :return: par (op, arg) com op em ACT_*
+    """
+    if not cell:
+        return (ACT_EMPTY, 0)
+    if cell.startswith("e"):
+        return (ACT_ERROR, 0)
+    if cell.startswith("s"):
+        return (ACT_SHIFT, int(cell[1:]))
+    if cell.startswith("r"):
+        return (ACT_REDUCE, int(cell[1:]))
+    if cell == "acc":
+        return (ACT_ACCEPT, 0)
+    if cell.isdigit():
+        return (ACT_GOTO, int(cell))
+    return (ACT_UNKNOWN, 0)
+
+_decoded_slr: tuple = (None, None)  # (tabela original, tabela decodificada)
+
+def decode_slr_table(slr_dict: dict) -> dict[str, tuple[tuple[int, int], ...]]:
+    """
+    Decodifica a tabela SLR uma única vez, para o laço do parser só indexar inteiros.
+    A última tabela decodificada fica guardada (o compilador usa sempre a mesma).
+
+    :param slr_dict: tabela no formato columnar de build_slr_table
+    :return: símbolo -> tupla de (op, arg) por estado
+    """
+    global _decoded_slr
+    if _decoded_slr[0] is not slr_dict:
+        decoded = {sym: tuple(map(decode_slr_cell, col)) for sym, col in slr_dict.items()}
+        _decoded_slr = (slr_dict, decoded)
+    return _decoded_slr[1]
+
+_RECOVERY_OPS = (ACT_SHIFT, ACT_ACCEPT)  # só ações que consomem o token ou terminam a análise
+
+def _goto_targets(table: dict, state: int, memo: dict) -> list:
+    """
+    Lista os GOTOs válidos de um estado, na ordem dos não-terminais da gramática.
+
+    :param table: tabela decodificada por decode_slr_table
+    :param state: estado de origem
+    :param memo: cache estado -> lista, válido para uma mesma tabela
+    :return: lista de (não-terminal, estado de destino)
+    """
+    targets = memo.get(state)
+    if targets is None:
+        targets = memo[state] = [(nt, table[nt][state][1]) for nt in gramatica
+                                 if nt in table and table[nt][state][0] == ACT_GOTO]
+    return targets
+
+def _find_recovery(table: dict, stack: list, current_token: str, input_tokens: deque, memo: dict) -> tuple | None:
+    """
+    Procura o ponto de sincronização da recuperação em modo pânico: o menor número de
+    tokens descartados e, para ele, o menor número de estados desempilhados a partir do
+    qual o token de sincronização é empilhado (ou aceito), direto ou depois de um GOTO por
+    algum não-terminal cujo FOLLOW o contém. Como o token de sincronização sempre é
+    consumido, cada recuperação avança a entrada e a análise termina.
+
+    :param table: tabela decodificada por decode_slr_table
+    :param stack: pilha do parser (símbolos e estados intercalados)
+    :param current_token: token que causou o erro
+    :param input_tokens: tokens restantes, terminando em ENDMARK
+    :param memo: cache usado por _goto_targets
+    :return: (tokens descartados, estados desempilhados, não-terminal ou None, estado do GOTO) ou None
+    """
+    states = stack[-1::-2]  # do topo até o estado inicial
+    upcoming = chain((current_token,), (token[0] for token in input_tokens))
+    for skip, token in enumerate(upcoming):
+        column = table.get(token)
+        if column is None:
+            continue
+        if skip and column[states[0]][0] in _RECOVERY_OPS:
+            return skip, 0, None, 0
+        for depth, state in enumerate(states):
+            for nt, goto_state in _goto_targets(table, state, memo):
+                if column[goto_state][0] in _RECOVERY_OPS:
+                    return skip, depth, nt, goto_state
+    return None
+
+def parse(token_tuples: list, line_list: list, slr_dict: dict, debug: bool = False) -> tuple[bool, list, DerivationTree, list]:
+    """Função para analisar uma lista de tuplas de tokens usando um dicionário SLR.
+
+    Com ``debug`` ligado, o passo a passo da análise é acumulado e escrito de
+    uma só vez ao final; desligado, nenhuma string de rastreio é montada.
+    """
     stack = [ENDMARK, 0]  # Pilha de estados e símbolos
-    input_tokens = token_tuples + [(ENDMARK, ENDMARK)]  # Adiciona marcador de fim
-    prods = [prod for prods in gramatica.values() for prod in prods]  # Lista de produções
-    current_token_info = input_tokens.pop(0)  # (tipo, lexema)
+    input_tokens = deque(token_tuples)
+    input_tokens.append((ENDMARK, ENDMARK))  # Adiciona marcador de fim
+    line_list = deque(line_list)  # popleft() em O(1), sem deslocar o resto da lista
+    table = decode_slr_table(slr_dict)
+    current_token_info = input_tokens.popleft()  # (tipo, lexema)
     current_token = current_token_info[0]
     current_lexeme = current_token_info[1] if len(current_token_info) > 1 else current_token_info[0]
+    # Coluna da tabela do token atual: resolvida uma vez por token, e não a cada passo
+    # (as reduções não consomem entrada, então reaproveitam a mesma coluna)
+    column = table.get(current_token)
     # Inicializa a árvore de derivação bottom-up
     derivation_tree = DerivationTree()
     step_count = 0
     error_list = []
-    # Proteção adicional: se ficarmos repetindo o mesmo erro (mesmo estado+token)
-    # muitas vezes, interrompemos para evitar loop infinito.
-    last_error_key = None
-    error_streak = 0
-    ERROR_STREAK_LIMIT = 1000
+    consumed = 0  # tokens já consumidos (empilhados ou descartados)
+    # Depois de uma recuperação, novos erros só são relatados após alguns tokens consumidos
+    ERROR_QUIET_TOKENS = 3
+    quiet_until = 0
+    goto_memo = {}
+    trace = []
 
-    while True:
-        step_count += 1
-        # Limite de segurança: verificar imediatamente para que 'continue'
-        # dentro do loop não permita ultrapassar o limite.
-        if step_count > 1000:
-            #print("❌ Muitos passos, parando por segurança")
-            break
-        top = stack[-1]  # Topo da pilha (estado atual)
-        action = slr_dict.get(current_token, [])[int(top)] if current_token in slr_dict else ''
-        #print(f"Step {step_count}: state: {top}, current_token: {current_token}, action: {action}")
-        if not action:
-            #print(f"❌ Erro: Ação inválida para estado {top} e token '{current_token}'")
-            return False, stack, derivation_tree, error_list
-        if action.startswith("e"): # ERROR
-            # os erros devem ser armazenados em uma lista para serem exibidos no final
-            #print(f"❌ Erro de sintaxe: entrada inesperada '{current_token}' na linha {line_list[0]}")
-            # armazena o erro na lista, junto com informação de que linha o erro é
-            error_list.append(f"Erro de sintaxe: entrada inesperada '{current_token}' na {line_list[0]}")
-            current_token = input_tokens.pop(0) if input_tokens else (ENDMARK, ENDMARK)
-            current_token = current_token[0] if isinstance(current_token, tuple) else current_token
-            current_lexeme = current_token[1] if isinstance(current_token, tuple) and len(current_token) > 1 else current_token
-            # Proteção contra ficar preso repetindo o mesmo par (estado,token)
-            error_key = (top, current_token)
-            if error_key == last_error_key:
-                error_streak += 1
-            else:
-                last_error_key = error_key
-                error_streak = 1
-            if error_streak >= ERROR_STREAK_LIMIT:
-                #print(f"❌ Loop de erro detectado: estado {top} e token '{current_token}' repetidos {error_streak} vezes. Interrompendo.")
-                error_list.append(f"Loop de erro detectado em estado {top} com token '{current_token}'")
-                break
-            if len(line_list) > 1:
-                line_list.pop(0)
-            continue
-        elif action.startswith("s"):  # SHIFT
-            next_state = int(action[1:])
-            stack.append(current_token)
-            stack.append(next_state)
-            # 🔧 CORREÇÃO: Adiciona terminal à árvore bottom-up com linha
-            current_line = int(line_list[0]) if line_list and line_list[0] else 0
-            derivation_tree.shift_terminal(current_token, current_lexeme, next_state, line=current_line)
-            #print(f"   SHIFT: Empilhado '{current_token}' ('{current_lexeme}') e estado {next_state}")
-            # Avança para o próximo token
-            if input_tokens:
-                current_token_info = input_tokens.pop(0)
-                current_token = current_token_info[0]
-                current_lexeme = current_token_info[1] if len(current_token_info) > 1 else current_token_info[0]
-            if len(line_list) > 0:
-                line_list.pop(0)
-        elif action.startswith("r"):  # REDUCE
-            num_prod = int(action[1:])  # Produção a ser aplicada
-            production = prods[num_prod]
-            num_symbols = len(production) * 2  # Número de elementos a remover da pilha
-            # Encontra o não-terminal da produção
-            nt_prod = None
-            for nt in gramatica:
-                if production in gramatica[nt]:
-                    nt_prod = nt
+    try:
+        while True:
+            # Sem limite de passos: toda recuperação consome o token de sincronização,
+            # então a análise sempre termina
+            step_count += 1
+            top = stack[-1]  # Topo da pilha (estado atual)
+            op, arg = column[top] if column is not None else (ACT_EMPTY, 0)
+            if debug: trace.append(f"Step {step_count}: state: {top}, current_token: {current_token}, action: {slr_dict[current_token][top] if column is not None else ''}")
+            if op == ACT_EMPTY or op == ACT_ERROR: # ERROR (célula vazia ou token sem coluna na tabela)
+                # os erros devem ser armazenados em uma lista para serem exibidos no final
+                where = f"na {line_list[0]}" if line_list else "no fim do arquivo"
+                if debug: trace.append(f"❌ Erro de sintaxe: entrada inesperada '{current_token}' {where}")
+                # armazena o erro na lista, junto com informação de que linha o erro é; erros
+                # logo após uma recuperação são da mesma região e não são repetidos
+                if consumed >= quiet_until:
+                    error_list.append(f"Erro de sintaxe: entrada inesperada '{current_token}' {where}")
+                # Recuperação em modo pânico
+                recovery = _find_recovery(table, stack, current_token, input_tokens, goto_memo)
+                if recovery is None:
+                    if debug: trace.append("❌ Nenhum ponto de sincronização até o fim da entrada")
                     break
-            #print(f"   REDUCE: Aplicando produção {num_prod}: {nt_prod} -> {' '.join(production)}")
-            #print(f"   Removendo {num_symbols} elementos da pilha")
-            # Remove os símbolos da produção da pilha
-            for _ in range(num_symbols):
-                if len(stack) > 2:  # Mantém pelo menos $ e estado inicial
-                    stack.pop()
-            # Adiciona o não-terminal da produção
-            stack.append(nt_prod)
-            # Calcula novo estado via GOTO
-            goto_state = slr_dict.get(nt_prod, [])[int(stack[-2])] if nt_prod in slr_dict else ''
-            if goto_state:
-                new_state = int(goto_state)
-                stack.append(new_state)
-                # 🔧 CORREÇÃO: Cria nó não-terminal conectando aos filhos
-                derivation_tree.reduce_production(nt_prod, production, new_state)
-                #print(f"   Empilhado não-terminal '{nt_prod}' e estado {new_state}")
-            else:
-                #print(f"❌ Erro: GOTO não encontrado para '{nt_prod}' no estado {stack[-2]}")
-                return False, stack, derivation_tree, error_list
-        elif action == "acc":  # ACCEPT
-            #print("✅ Cadeia aceita!")
-            return True, stack, derivation_tree, error_list
-        #print(f"   Pilha atual: {stack}")
-        #print(f"   Próximo token: {current_token}")
-        #print("-" * 60)
-        # (cheque de segurança movido para o início do loop)
-    return False, stack, derivation_tree, error_list
+                skip, depth, nt, goto_state = recovery
+                # Descarta de uma vez os tokens até o token de sincronização
+                for _ in range(skip):
+                    current_token_info = input_tokens.popleft()
+                    if line_list:
+                        line_list.popleft()
+                if skip:
+                    current_token = current_token_info[0]
+                    current_lexeme = current_token_info[1] if len(current_token_info) > 1 else current_token_info[0]
+                    column = table.get(current_token)
+                consumed += skip
+                quiet_until = consumed + ERROR_QUIET_TOKENS
+                if nt is not None:
+                    # Desempilha os estados acima do ponto de sincronização e empilha o
+                    # não-terminal no lugar deles (os nós desempilhados viram seus filhos)
+                    cut = len(stack) - 2 * depth
+                    popped = stack[cut::2]
+                    del stack[cut:]
+                    stack.append(nt)
+                    stack.append(goto_state)
+                    derivation_tree.reduce_production(nt, popped, goto_state)
+                if debug: trace.append(f"   RECUPERAÇÃO: {skip} token(s) descartado(s), {depth} estado(s) desempilhado(s), sincronizado em '{current_token}'" + (f" após '{nt}' e estado {goto_state}" if nt is not None else ""))
+                continue
+            elif op == ACT_SHIFT:  # SHIFT
+                next_state = arg
+                stack.append(current_token)
+                stack.append(next_state)
+                # 🔧 CORREÇÃO: Adiciona terminal à árvore bottom-up com linha
+                current_line = int(line_list[0]) if line_list and line_list[0] else 0
+                derivation_tree.shift_terminal(current_token, current_lexeme, next_state, line=current_line)
+                if debug: trace.append(f"   SHIFT: Empilhado '{current_token}' ('{current_lexeme}') e estado {next_state}")
+                # Avança para o próximo token
+                if input_tokens:
+                    current_token_info = input_tokens.popleft()
+                    current_token = current_token_info[0]
+                    current_lexeme = current_token_info[1] if len(current_token_info) > 1 else current_token_info[0]
+                    column = table.get(current_token)
+                if len(line_list) > 0:
+                    line_list.popleft()
+                consumed += 1
+            elif op == ACT_REDUCE:  # REDUCE
+                num_prod = arg  # Produção a ser aplicada
+                production = PROD_RHS[num_prod]
+                num_symbols = PROD_LEN[num_prod] * 2  # Número de elementos a remover da pilha
+                # Não-terminal da produção
+                nt_prod = PROD_LHS[num_prod]
+                if debug:
+                    trace.append(f"   REDUCE: Aplicando produção {num_prod}: {nt_prod} -> {' '.join(production)}")
+                    trace.append(f"   Removendo {num_symbols} elementos da pilha")
+                # Remove os símbolos da produção da pilha
+                for _ in range(num_symbols):
+                    if len(stack) > 2:  # Mantém pelo menos $ e estado inicial
+                        stack.pop()
+                # Adiciona o não-terminal da produção
+                stack.append(nt_prod)
+                # Calcula novo estado via GOTO
+                goto_column = table.get(nt_prod)
+                goto_op, goto_state = goto_column[stack[-2]] if goto_column is not None else (ACT_EMPTY, 0)
+                if goto_op == ACT_GOTO:
+                    new_state = goto_state
+                    stack.append(new_state)
+                    # 🔧 CORREÇÃO: Cria nó não-terminal conectando aos filhos
+                    derivation_tree.reduce_production(nt_prod, production, new_state)
+                    if debug: trace.append(f"   Empilhado não-terminal '{nt_prod}' e estado {new_state}")
+                else:
+                    if debug: trace.append(f"❌ Erro: GOTO não encontrado para '{nt_prod}' no estado {stack[-2]}")
+                    return False, stack, derivation_tree, error_list
+            elif op == ACT_ACCEPT:  # ACCEPT
+                if debug: trace.append("✅ Cadeia aceita!")
+                return True, stack, derivation_tree, error_list
+            if debug:
+                trace.append(f"   Pilha atual: {stack}")
+                trace.append(f"   Próximo token: {current_token}")
+                trace.append("-" * 60)
+        return False, stack, derivation_tree, error_list
+    finally:
+        if trace:
+            sys.stdout.write("\n".join(trace) + "\n")
 
-def _write_node_to_file(tree, node, prefix, is_last, is_root, file):
-    """Escreve um nó no arquivo com formatação de árvore"""
-    display_text = str(node)
-    if is_root:
-        file.write(f"{display_text}\n")
-    else:
-        connector = "└───" if is_last else "├───"
-        file.write(f"{prefix}{connector}{display_text}\n")
-    if not is_root:
-        child_prefix = prefix + ("    " if is_last else "│   ")
-    else:
-        child_prefix = ""
-    for i, child in enumerate(node.children):
-        is_last_child = (i == len(node.children) - 1)
-        tree._write_node_to_file(child, child_prefix, is_last_child, False, file)
-
-# Adiciona o método à classe
-DerivationTree._write_node_to_file = _write_node_to_file
-
-def derv(token_list: list, slr_table: dict) -> DerivationTree | None:
-    """Função principal de derivação"""
-    #print("🔄 Iniciando análise sintática bottom-up...")
+def derv(token_list: list, slr_table: dict, debug: bool = False) -> DerivationTree | None:
+    """Função principal de derivação; retorna None se a entrada tiver erros de sintaxe"""
+    if debug: print("🔄 Iniciando análise sintática bottom-up...")
     # Transforma token_list em tuplas (tipo, valor)
     token_tuples, line_list = read_tuples(token_list)
-    #pprint.pprint(token_tuples)
-    #print(f"✅ {len(token_tuples)} tokens processados")
+    if debug: print(f"✅ {len(token_tuples)} tokens processados")
     # Usa tabela SLR recebida por parâmetro
     slr_dict = slr_table
     if not slr_dict:
-        #print("❌ Tabela SLR vazia ou inválida (parâmetro)")
+        if debug: print("❌ Tabela SLR vazia ou inválida (parâmetro)")
         return None
-    #print("✅ Tabela SLR carregada (parâmetro)")
-    #print("=" * 60)
+    if debug: print("✅ Tabela SLR carregada (parâmetro)\n" + "=" * 60)
     # Executa análise
-    success, final_stack, derivation_tree, errors = parse(token_tuples, line_list, slr_dict)
-    #print("=" * 60)
+    success, final_stack, derivation_tree, errors = parse(token_tuples, line_list, slr_dict, debug)
+    if debug: print("=" * 60)
     if success:
-        #print("🎉 ANÁLISE SINTÁTICA CONCLUÍDA COM SUCESSO!")
-        #print("=" * 60)
-        #print("Erros encontrados durante a análise (se houver):")
+        if debug: print("🎉 ANÁLISE SINTÁTICA CONCLUÍDA COM SUCESSO!\n" + "=" * 60 + "\nErros encontrados durante a análise (se houver):")
         if errors:
-            for err in errors:
-                print(f" - {err}")
+            sys.stdout.write("".join(f" - {err}\n" for err in errors))
         
     else:
-        #print("❌ ANÁLISE SINTÁTICA FALHOU!")
-        #print("\nErros encontrados durante a análise (se houver):")
+        if debug: print("❌ ANÁLISE SINTÁTICA FALHOU!\n\nErros encontrados durante a análise (se houver):")
         if errors:
-            for err in errors:
-                print(f" - {err}")
-        #print("Árvore parcial construída:")
+            sys.stdout.write("".join(f" - {err}\n" for err in errors))
+        if debug: print("Árvore parcial construída:")
         derivation_tree.print_tree_format()
-    #print("=" * 60)
+    if debug: print("=" * 60)
+    # Com erros de sintaxe a árvore contém nós de recuperação e não segue para as próximas fases
+    if errors or not success:
+        return None
     return derivation_tree
\ No newline at end of file
@@ -1,79 +1,131 @@
-""" Modulo para computar os conjuntos FIRST e FOLLOW de uma gramática livre de contexto (CFG) e salvar os resultados em um arquivo CSV. """
+""" Modulo para computar os conjuntos FIRST e FOLLOW de uma gramática livre de contexto (CFG). """
 
 from .gramatica_util import ALL_NONTERMINALS, ALL_TERMINALS, EPS, ENDMARK
 
-import csv, os
 
-def compute_first(prod_list:list, grammar:dict) -> set:
+# Cada terminal (mais ε e $) ocupa um bit; um conjunto FIRST/FOLLOW vira um int
+SYMBOL_BITS = {sym: 1 << i for i, sym in enumerate(sorted(ALL_TERMINALS) + [EPS, ENDMARK])}
+EPS_BIT = SYMBOL_BITS[EPS]
+
+def mask_to_set(mask: int) -> set:
+    """
+    converte uma máscara de bits de volta para um conjunto de símbolos
+
+    :param mask: máscara com um bit por terminal
+    :return: conjunto com os símbolos cujos bits estão ligados
+    """
+    return {sym for sym, bit in SYMBOL_BITS.items() if mask & bit}
+
+def compute_first_masks(grammar:dict) -> dict:
     """
-    computa o conjunto FIRST para uma produção
+    computa os conjuntos FIRST de todos os não-terminais por ponto fixo
 
-    :param prod_list: lista de produções (cada produção é uma lista de símbolos)
-    :return: conjunto FIRST como um set
+    :param grammar: dicionário representando a gramática
+    :return: dict não-terminal -> conjunto FIRST como máscara de bits
     """
-    result_set = set()
-    for prod in prod_list:
-        if prod[0] in ALL_TERMINALS:
-            result_set.add(prod[0])
-        elif prod[0] == EPS:
-            result_set.add(EPS)
-        elif prod[0] == 'EXPRESSAO':
-            continue
-        elif prod[0] in ALL_NONTERMINALS:
-            result_set.update(compute_first(grammar[prod[0]], grammar))
-    return result_set
-
-def compute_follow(key:str, grammar:dict, first_sets:dict, follow_sets:dict) -> set:
+    # a contribuição de cada produção é fixa (um terminal, ε) ou vem do FIRST de um
+    # não-terminal; as fixas entram uma vez só
+    first = {nt: 0 for nt in grammar}
+    deps = {nt: [] for nt in grammar}
+    for nt, productions in grammar.items():
+        for prod in productions:
+            if prod[0] in ALL_TERMINALS:
+                first[nt] |= SYMBOL_BITS[prod[0]]
+            elif prod[0] == EPS:
+                first[nt] |= EPS_BIT
+            elif prod[0] in ALL_NONTERMINALS:
+                deps[nt].append(prod[0])
+
+    # FIRST(B) ⊆ FIRST(A) quando A -> B ...: propaga até estabilizar, o que cobre
+    # recursão à esquerda direta e mútua
+    changed = True
+    while changed:
+        changed = False
+        for nt, sources in deps.items():
+            for B in sources:
+                if first[B] & ~first[nt]:
+                    first[nt] |= first[B]
+                    changed = True
+    return first
+
+def compute_follow_occurrences(grammar:dict, first_masks:dict) -> dict:
     """
-    computa o conjunto FOLLOW para uma produção
+    indexa, uma única vez, cada ocorrência de um não-terminal B nos lados direitos: A -> α B β
 
-    :param key: o não-terminal para o qual estamos computando o conjunto FOLLOW
     :param grammar: dicionário representando a gramática
-    :param first_sets: dicionário com os conjuntos FIRST de cada não-terminal
-    :param follow_sets: dicionário com os conjuntos FOLLOW de cada não-terminal
-    :return: conjunto FOLLOW como um set
+    :param first_masks: dicionário com as máscaras FIRST de cada não-terminal
+    :return: dict B -> lista de (A, FIRST(β) sem ε, β anulável)
     """
-    follow = follow_sets[key]
+    occurrences = {nt: [] for nt in grammar}
     for A, productions in grammar.items():
         for production in productions:
             for i, B in enumerate(production):
-                if B == key:
-                    if i + 1 < len(production):
-                        beta = production[i + 1]
-                        if beta in ALL_TERMINALS:
-                            follow.add(beta)
-                        elif beta in ALL_NONTERMINALS:
-                            follow.update(x for x in first_sets[beta] if x != EPS)
-                            if EPS in first_sets[beta]:
-                                follow.update(follow_sets[A])
+                if B not in occurrences:
+                    continue
+                beta_first = 0
+                beta_nullable = True
+                for sym in production[i + 1:]:
+                    if sym == EPS:
+                        continue
+                    if sym in ALL_NONTERMINALS:
+                        beta_first |= first_masks[sym] & ~EPS_BIT
+                        if first_masks[sym] & EPS_BIT:
+                            continue
                     else:
-                        if A != key:
-                            follow.update(follow_sets[A])
+                        beta_first |= SYMBOL_BITS[sym]
+                    beta_nullable = False
+                    break
+                occurrences[B].append((A, beta_first, beta_nullable))
+    return occurrences
+
+def compute_follow_masks(grammar:dict, first_masks:dict) -> dict:
+    """
+    computa os conjuntos FOLLOW de todos os não-terminais por ponto fixo
+
+    :param grammar: dicionário representando a gramática
+    :param first_masks: dicionário com as máscaras FIRST de cada não-terminal
+    :return: dict não-terminal -> conjunto FOLLOW como máscara de bits
+    """
+    occurrences = compute_follow_occurrences(grammar, first_masks)
+
+    follow = {nt: 0 for nt in grammar}
+    follow[next(iter(grammar))] = SYMBOL_BITS[ENDMARK]  # o primeiro não-terminal é o inicial
+
+    # FIRST(β) não depende de FOLLOW: entra uma vez só
+    for B, entries in occurrences.items():
+        for A, beta_first, beta_nullable in entries:
+            follow[B] |= beta_first
+
+    # FOLLOW(A) ⊆ FOLLOW(B) quando β é anulável: propaga até estabilizar
+    changed = True
+    while changed:
+        changed = False
+        for B, entries in occurrences.items():
+            for A, beta_first, beta_nullable in entries:
+                if beta_nullable and follow[A] & ~follow[B]:
+                    follow[B] |= follow[A]
+                    changed = True
     return follow
 
 
+_ff_cache: tuple = (None, None)  # (gramática, máscaras FIRST/FOLLOW calculadas)
+
 def compute_first_follow(grammar: dict) -> dict:
     """
-    computa os conjuntos FIRST e FOLLOW para a gramática fornecida e salva conjunto em um arquivo .csv
+    computa os conjuntos FIRST e FOLLOW para a gramática fornecida;
+    as máscaras da última gramática ficam guardadas e só a conversão para conjuntos
+    é refeita nas chamadas seguintes, de modo que quem chama recebe conjuntos próprios
 
     :param grammar: dicionário representando a gramática
     :return: dict com conjuntos FIRST e FOLLOW
-    """    
-    ff_file_path = os.path.join("data", "first_follow.csv")
-
-    first = {nt: set() for nt in grammar}
-    for key in grammar:
-        first[key] = compute_first(grammar[key], grammar)
-
-    follow = {nt: set() for nt in grammar}
-    for key in grammar:
-        if key == list(grammar.keys())[0]:  # Supondo que o primeiro não-terminal é o inicial
-            follow[key].add(ENDMARK)  # Adiciona o marcador de fim de entrada ao FOLLOW do símbolo inicial
-        else:
-            follow[key] = compute_follow(key, grammar, first, follow)
-    
-    # junta em first e follow em um único dicionario
-    ff_set = {nt: {"first": first[nt], "follow": follow[nt]} for nt in grammar}
-
-    
-    return ff_set
\ No newline at end of file
+    """
+    global _ff_cache
+    if _ff_cache[0] is grammar:
+        first, follow = _ff_cache[1]
+    else:
+        first = compute_first_masks(grammar)
+        follow = compute_follow_masks(grammar, first)
+        _ff_cache = (grammar, (first, follow))
+
+    # junta em first e follow em um único dicionario (convertendo as máscaras para conjuntos)
+    return {nt: {"first": mask_to_set(first[nt]), "follow": mask_to_set(follow[nt])} for nt in grammar}
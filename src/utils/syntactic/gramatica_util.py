@@ -108,5 +108,10 @@ gramatica = {
     ]
 }
 
-ALL_NONTERMINALS = set(gramatica.keys())
-ALL_TERMINALS = set(sym for prod in gramatica.values() for prod_aux in prod for sym in prod_aux if sym not in ALL_NONTERMINALS and sym != EPS)
\ No newline at end of file
+ALL_NONTERMINALS = frozenset(gramatica)
+ALL_TERMINALS = frozenset(sym for prods in gramatica.values() for prod in prods for sym in prod) - ALL_NONTERMINALS - {EPS}
+
+# Produções numeradas na ordem de `gramatica` (o N das reduções rN): lado esquerdo, lado direito e tamanho
+PROD_LHS = tuple(nt for nt, prods in gramatica.items() for _ in prods)
+PROD_RHS = tuple(tuple(prod) for prods in gramatica.values() for prod in prods)
+PROD_LEN = tuple(len(prod) for prod in PROD_RHS)
\ No newline at end of file
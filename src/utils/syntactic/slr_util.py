@@ -1,8 +1,19 @@
 """ Modulo com funções que criaram a tabela SLR(1) de análise sintática. """
 
 from .gramatica_util import ALL_TERMINALS, ALL_NONTERMINALS, EPS, ENDMARK
-import csv, os
+from .ff_util import compute_first_follow
+import os, sys, hashlib, pickle
 from collections import defaultdict
+from pathlib import Path
+
+# Ancorado na raiz do projeto (src/utils/syntactic -> raiz), e não no diretório de
+# onde o compilador é chamado: nada é criado nem carregado fora do projeto
+SLR_CACHE_PATH = str(Path(__file__).resolve().parents[3] / "data" / "slr_table.pkl")
+# Incrementar quando o formato da tabela gerada mudar, invalidando caches antigos
+SLR_CACHE_VERSION = 2
+
+# Memo de closure() por núcleo (kernel); limpo a cada compute_lr0_states
+_closure_cache: dict[frozenset, frozenset] = {}
 
 def augment_grammar(grammar: dict) -> dict:
     """
@@ -11,7 +22,7 @@ def augment_grammar(grammar: dict) -> dict:
     :param grammar: dicionário da gramática original
     :return: gramática aumentada
     """
-    start_symbol = list(grammar.keys())[0]
+    start_symbol = next(iter(grammar))  # o primeiro não-terminal é o inicial
     augmented = {"S'": [[start_symbol]]}
     augmented.update(grammar)
     return augmented
@@ -28,113 +39,153 @@ def compute_lr0_items(grammar: dict) -> dict:
     
     for lhs, productions in grammar.items():
         for production in productions:
+            # Uma tupla por produção; as fatias já saem como tuplas, e o item completo
+            # (ponto no fim) reaproveita a própria tupla da produção
+            production = tuple(production)
             # Cria itens com ponto em todas as posições possíveis
             for dot_pos in range(len(production) + 1):
                 before_dot = production[:dot_pos]
                 after_dot = production[dot_pos:]
                 
-                item = (lhs, tuple(before_dot), tuple(after_dot))
+                item = (lhs, before_dot, after_dot)
                 items[item_id] = item
                 item_id += 1
     
     return items
 
-def closure(items: set, grammar: dict) -> set:
+# Tabelas de itens LR(0) numerados, por gramática
+_item_tables_cache: dict = {}  # id(gramática) -> (gramática, tabelas)
+
+def lr0_item_tables(grammar: dict) -> tuple[list, list, dict]:
+    """
+    Numera os itens LR(0) da gramática (na ordem de compute_lr0_items) e pré-calcula o que
+    closure e goto consultam. Os itens de uma produção têm ids consecutivos, com o ponto
+    na posição 0, 1, ...; avançar o ponto do item i dá o item i + 1.
+
+    :param grammar: dicionário da gramática
+    :return: tupla (id -> item (lhs, antes do ponto, depois do ponto),
+             id -> símbolo logo após o ponto ou None, não-terminal -> frozenset dos ids dos itens A -> •α)
+    """
+    cached = _item_tables_cache.get(id(grammar))
+    if cached is not None and cached[0] is grammar:
+        return cached[1]
+
+    items = list(compute_lr0_items(grammar).values())
+    after0 = [after_dot[0] if after_dot else None for _, _, after_dot in items]
+    initial = {}
+    for item_id, (lhs, before_dot, _) in enumerate(items):
+        if not before_dot:
+            initial.setdefault(lhs, []).append(item_id)
+    initial = {lhs: frozenset(ids) for lhs, ids in initial.items()}
+
+    tables = (items, after0, initial)
+    _item_tables_cache[id(grammar)] = (grammar, tables)
+    return tables
+
+def closure(items: set, grammar: dict) -> frozenset:
     """
     Computa o fechamento de um conjunto de itens LR(0)
     
-    :param items: conjunto de itens LR(0)
+    :param items: conjunto de ids de itens LR(0) (ver lr0_item_tables)
     :param grammar: dicionário da gramática
-    :return: fechamento do conjunto de itens
+    :return: fechamento do conjunto de itens (imutável, compartilhado pelo memo)
     """
+    key = frozenset(items)
+    cached = _closure_cache.get(key)
+    if cached is not None:
+        return cached
+
+    _, after0, initial = lr0_item_tables(grammar)
     closure_set = set(items)
-    added = True
+    # Lista de trabalho: cada item é examinado uma vez, e cada não-terminal é
+    # expandido uma vez (seus itens iniciais entram todos juntos)
+    worklist = list(closure_set)
+    expanded = set()
     
-    while added:
-        added = False
-        new_items = set()
+    while worklist:
+        next_symbol = after0[worklist.pop()]
         
-        for item in closure_set:
-            lhs, before_dot, after_dot = item
-            
-            # Se há símbolos após o ponto e o primeiro é não-terminal
-            if after_dot and after_dot[0] in ALL_NONTERMINALS:
-                next_symbol = after_dot[0]
-                
-                # Adiciona todos os itens A -> •α para cada produção A -> α
-                if next_symbol in grammar:
-                    for production in grammar[next_symbol]:
-                        new_item = (next_symbol, (), tuple(production))
-                        if new_item not in closure_set:
-                            new_items.add(new_item)
-                            added = True
-        
-        closure_set.update(new_items)
+        # Se há símbolos após o ponto e o primeiro é não-terminal, adiciona
+        # todos os itens A -> •α para cada produção A -> α
+        if next_symbol in initial and next_symbol not in expanded:
+            expanded.add(next_symbol)
+            new_items = initial[next_symbol] - closure_set
+            closure_set |= new_items
+            worklist.extend(new_items)
     
+    closure_set = _closure_cache[key] = frozenset(closure_set)
     return closure_set
 
-def goto(items: set, symbol: str, grammar: dict) -> set:
+def goto(items: set, symbol: str, grammar: dict) -> frozenset:
     """
     Computa a função GOTO para um conjunto de itens e um símbolo
     
-    :param items: conjunto de itens LR(0)
+    :param items: conjunto de ids de itens LR(0)
     :param symbol: símbolo da gramática
     :param grammar: dicionário da gramática
     :return: conjunto GOTO(items, symbol)
     """
-    goto_set = set()
-    
-    for item in items:
-        lhs, before_dot, after_dot = item
-        
-        # Se o símbolo após o ponto é o símbolo desejado
-        if after_dot and after_dot[0] == symbol:
-            # Move o ponto uma posição para a direita
-            new_before = before_dot + (after_dot[0],)
-            new_after = after_dot[1:]
-            new_item = (lhs, new_before, new_after)
-            goto_set.add(new_item)
+    _, after0, _ = lr0_item_tables(grammar)
+    # Move o ponto uma posição para a direita nos itens com o símbolo após o ponto
+    goto_set = {item + 1 for item in items if after0[item] == symbol}
     
-    return closure(goto_set, grammar) if goto_set else set()
+    return closure(goto_set, grammar) if goto_set else frozenset()
+
+def index_state(state: frozenset, grammar: dict) -> tuple[dict, list]:
+    """
+    Agrupa os itens de um estado pelo símbolo logo após o ponto, em uma única passada
+
+    :param state: conjunto de ids de itens LR(0)
+    :param grammar: dicionário da gramática
+    :return: tupla (símbolo -> itens com esse símbolo após o ponto, itens completos)
+    """
+    _, after0, _ = lr0_item_tables(grammar)
+    next_syms = defaultdict(list)
+    complete = []
+    for item in state:
+        symbol = after0[item]
+        if symbol is not None:
+            next_syms[symbol].append(item)
+        else:
+            complete.append(item)
+    return next_syms, complete
 
 def compute_lr0_states(grammar: dict) -> tuple:
     """
     Computa todos os estados LR(0) da gramática
     
     :param grammar: dicionário da gramática aumentada
-    :return: tupla contendo (estados, transições)
+    :return: tupla contendo (estados como conjuntos de ids de itens, transições)
     """
+    _closure_cache.clear()  # o memo não inclui a gramática na chave
+    # cada construção recebe uma gramática aumentada nova: descarta as tabelas das anteriores
+    _item_tables_cache.clear()
+
     # Estado inicial: fechamento de [S' -> •S]
-    start_symbol = list(grammar.keys())[1]  # Segundo símbolo (primeiro após S')
-    start_item = ("S'", (), (start_symbol,))  # S' -> •S
-    initial_state = closure({start_item}, grammar)
+    _, _, initial = lr0_item_tables(grammar)
+    initial_state = closure(initial["S'"], grammar)
     
     states = [initial_state]
     transitions = {}
-    state_map = {frozenset(initial_state): 0}
+    state_map = {initial_state: 0}
     
     i = 0
     while i < len(states):
         current_state = states[i]
         
-        # Para cada símbolo da gramática
-        all_symbols = set()
-        for item in current_state:
-            lhs, before_dot, after_dot = item
-            if after_dot:
-                all_symbols.add(after_dot[0])
+        # Para cada símbolo após o ponto, GOTO só olha os itens que o têm
+        next_syms, _ = index_state(current_state, grammar)
         
-        for symbol in all_symbols:
-            next_state = goto(current_state, symbol, grammar)
+        for symbol, items in next_syms.items():
+            next_state = goto(items, symbol, grammar)
             
             if next_state:
-                next_state_frozen = frozenset(next_state)
-                
-                if next_state_frozen not in state_map:
-                    state_map[next_state_frozen] = len(states)
+                # goto() já devolve frozenset: uma única consulta/inserção no mapa
+                next_num = state_map.setdefault(next_state, len(states))
+                if next_num == len(states):
                     states.append(next_state)
                 
-                transitions[(i, symbol)] = state_map[next_state_frozen]
+                transitions[(i, symbol)] = next_num
         
         i += 1
     
@@ -142,107 +193,133 @@ def compute_lr0_states(grammar: dict) -> tuple:
 
 def build_slr_table(grammar: dict, first_follow: dict, debug: bool = False) -> dict:
     """
-    Constrói a tabela de análise SLR(1) e salva em um arquivo CSV
+    Constrói a tabela de análise SLR(1)
 
     :param grammar: dicionário da gramática
     :param first_follow: dicionários FIRST e FOLLOW
     :param debug: habilita a saída de depuração
-    :return: None
+    :return: tabela columnar: símbolo -> lista de células por estado
     """
     # Construção em memória; não depende de arquivo CSV.
 
     states, transitions = compute_lr0_states(grammar)
+    items, _, _ = lr0_item_tables(grammar)
     
-    # Inicializa a tabela
-    table = {
-        'action': defaultdict(dict),
-        'goto': defaultdict(dict)
-    }
+    # Inicializa a tabela já no formato columnar (símbolo -> lista densa por estado);
+    # None marca célula de ACTION ainda não preenchida
+    num_states = len(states)
+    terminals = sorted(ALL_TERMINALS) + [ENDMARK]
+    nonterminals = sorted(ALL_NONTERMINALS)
+    action: dict[str, list] = {t: [None] * num_states for t in terminals}
+    goto_table: dict[str, list[str]] = {nt: [''] * num_states for nt in nonterminals}
 
-    # Enumera as produções ORIGINAIS (sem S') para os números das reduções
+    # Enumera as produções ORIGINAIS (sem S') para os números das reduções,
+    # indexadas por (lhs, corpo) para achar o número de um item completo em O(1)
     original_grammar = {k: v for k, v in grammar.items() if k != "S'"}
-    productions = []
-    for lhs, prods in original_grammar.items():
-        for prod in prods:
-            productions.append((lhs, prod))
+    prod_index = {}
+    productions = ((lhs, prod) for lhs, prods in original_grammar.items() for prod in prods)
+    for prod_num, (lhs, prod) in enumerate(productions):
+        prod_index.setdefault((lhs, tuple(prod)), prod_num)  # como list.index: vale a primeira
+
+    # Mensagens de depuração acumuladas e escritas de uma vez ao final
+    debug_log: list[str] = []
 
     # Preenche a tabela
     for state_num, state in enumerate(states):
-        for item in state:
-            lhs, before_dot, after_dot = item
-            
-            # Shift: A -> α•aβ onde a é terminal
-            if after_dot and after_dot[0] in ALL_TERMINALS:
-                terminal = after_dot[0]
-                if (state_num, terminal) in transitions:
-                    next_state = transitions[(state_num, terminal)]
-                    table['action'][state_num][terminal] = f's{next_state}'
+        next_syms, complete = index_state(state, grammar)
+
+        # Itens em ordem de id, que é a ordem das produções: num conflito
+        # reduce/reduce vale a produção que aparece primeiro na gramática
+        for item in sorted(complete):
+            lhs, before_dot, _ = items[item]
             # Reduce: A -> α• onde A ≠ S' (item completo)
-            elif not after_dot and lhs != "S'":
-                prod_num = productions.index((lhs, list(before_dot)))
+            if lhs != "S'":
+                prod_num = prod_index[(lhs, before_dot)]
                 
                 # Para cada símbolo no FOLLOW(A)
                 if lhs in first_follow:
                     follow_set = first_follow[lhs]['follow']
                     
-                    for symbol in follow_set:
-                        if symbol in ALL_TERMINALS or symbol == ENDMARK:
-                            table['action'][state_num][symbol] = f'r{prod_num}'
+                    # ordenado: as mensagens de conflito não dependem do hash das strings
+                    for symbol in sorted(follow_set):
+                        if symbol not in action:
+                            continue
+                        current = action[symbol][state_num]
+                        if current is None:
+                            action[symbol][state_num] = f'r{prod_num}'
+                        elif debug:
+                            debug_log.append(f"⚠️ Conflito reduce/reduce no estado {state_num} com '{symbol}': {current} x r{prod_num} (mantida {current})")
                         
             # Accept: S' -> S•
-            elif not after_dot and lhs == "S'":
-                table['action'][state_num][ENDMARK] = 'acc'
+            else:
+                action[ENDMARK][state_num] = 'acc'
 
-        # GOTO para não-terminais
-        for nt in ALL_NONTERMINALS:
-            if (state_num, nt) in transitions:
-                next_state = transitions[(state_num, nt)]
-                table['goto'][state_num][nt] = next_state
+        # Shift (terminal após o ponto) ou GOTO (não-terminal após o ponto). A coluna
+        # em que o símbolo está já o classifica: uma única consulta por símbolo.
+        # O shift é gravado depois das reduções: em conflito shift/reduce, prevalece o shift
+        for symbol in next_syms:
+            next_state = transitions.get((state_num, symbol))
+            if next_state is None:
+                continue
+            if symbol in action:
+                if debug and action[symbol][state_num] is not None:
+                    debug_log.append(f"⚠️ Conflito shift/reduce no estado {state_num} com '{symbol}': s{next_state} x {action[symbol][state_num]} (mantido o shift)")
+                action[symbol][state_num] = f's{next_state}'
+            elif symbol in goto_table:
+                goto_table[symbol][state_num] = str(next_state)
 
     # linha da action que tenham redução devem ser preenchidas com redução por completo
-    # ALL_TERMINALS é um `set`, não suportando concatenação com lista. Convertemos
-    # para uma lista ordenada para garantir comportamento determinístico.
-    for state in table['action']:
-        for terminal in sorted(ALL_TERMINALS) + [ENDMARK]:
-            value = table['action'][state].get(terminal, '')
-            # Se já existe um shift (por exemplo 's3'), não sobrescrevemos
-            if isinstance(value, str) and value.startswith('s'):
-                continue
-            if isinstance(value, str) and value.startswith('r'):
+    # (na ordem ordenada dos terminais, para garantir comportamento determinístico)
+    action_cols = [action[t] for t in terminals]
+    for state_num in range(num_states):
+        # Uma passada por linha: as lacunas antes da primeira redução (na ordem dos
+        # terminais) viram 'error'; dali em diante, recebem essa redução (ação padrão).
+        # Shifts e entradas já preenchidas nunca são sobrescritos.
+        reduct = None
+        for col in action_cols:
+            value = col[state_num]
+            if value is None:
+                col[state_num] = reduct or 'error'
+            elif reduct is None and value.startswith('r'):
                 reduct = value
-                for t in sorted(ALL_TERMINALS) + [ENDMARK]:
-                    if t not in table['action'][state]:
-                        table['action'][state][t] = reduct
-                continue
-            if terminal not in table['action'][state]:
-                table['action'][state][terminal] = 'error'
 
-    #print("\nTabela SLR(1) construída com sucesso. ✅")
+    if debug:
+        debug_log.append(f"\nTabela SLR(1) construída com sucesso. ✅ ({num_states} estados)")
+        sys.stdout.write("\n".join(debug_log) + "\n")
 
-    # Converte para formato columnar: símbolo -> lista por estado
-    terminals = sorted(ALL_TERMINALS) + [ENDMARK]
-    nonterminals = sorted(ALL_NONTERMINALS)
+    # ACTION (terminais) seguida de GOTO (não-terminais)
+    columns: dict[str, list[str]] = {**action, **goto_table}
+
+    return columns
+
+def cached_slr_table(grammar: dict, cache_path: str = SLR_CACHE_PATH, debug: bool = False) -> dict:
+    """
+    Retorna a tabela SLR(1) da gramática, reaproveitando a cópia salva em disco
+    quando o hash da gramática não mudou
+
+    :param grammar: dicionário da gramática original (sem S')
+    :param cache_path: caminho do arquivo .pkl usado como cache
+    :param debug: repassado a build_slr_table quando a tabela precisa ser reconstruída
+    :return: tabela no mesmo formato de build_slr_table
+    """
+    grammar_hash = hashlib.sha1(repr((SLR_CACHE_VERSION, grammar)).encode()).hexdigest()
+
+    try:
+        with open(cache_path, "rb") as file:
+            cached_hash, table = pickle.load(file)
+        if cached_hash == grammar_hash:
+            if debug: print(f"✅ Tabela SLR(1) lida do cache ({cache_path})")
+            return table
+    except (OSError, EOFError, ValueError, TypeError, AttributeError, ImportError, pickle.UnpicklingError):
+        pass  # cache ausente, corrompido ou de outra versão: reconstrói
+
+    table = build_slr_table(augment_grammar(grammar), compute_first_follow(grammar), debug)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        with open(cache_path, "wb") as file:
+            pickle.dump((grammar_hash, table), file)
+    except OSError:
+        pass  # sem permissão de escrita: segue sem cache
 
-    max_state = max(
-        max(table['action'].keys(), default=-1),
-        max(table['goto'].keys(), default=-1)
-    )
-
-    columns: dict[str, list[str]] = {}
-
-    # ACTION (terminais)
-    for t in terminals:
-        col: list[str] = []
-        for s in range(max_state + 1):
-            col.append(table['action'][s].get(t, 'error'))
-        columns[t] = col
-
-    # GOTO (não-terminais)
-    for nt in nonterminals:
-        col: list[str] = []
-        for s in range(max_state + 1):
-            v = table['goto'][s].get(nt, '')
-            col.append(str(v) if v != '' else '')
-        columns[nt] = col
-
-    return columns
\ No newline at end of file
+    return table